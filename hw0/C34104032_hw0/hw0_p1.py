@@ -1,105 +1,12 @@
-def parse_polynomial(poly_str):
-    poly_str = poly_str.replace(" ", "")
-    terms = []
-    current_term = ""
-    
-    #iterate every char in the input string
-    #enumerate(str): return a pair of (idx,element) in a str
-    for i, char in enumerate(poly_str):
-        #find a new term
-        if char in "+-" and i > 0:
-            #add the previous term to the result list
-            terms.append(current_term)
-            #start a new tern
-            current_term = char
-        #extend the current term(ex. a term can be extended like 2X^2)
-        else:
-            current_term += char
-    
-    #can't find a "+" or "-" in the end of the input, so we need to add the last term to the list here
-    terms.append(current_term)
-    #the result may be like [2X^2, Y^3, ...]
-    return terms
-
-# extract coefficient, variables, and exponents for a single "term" like 2*XY^2
-def parse_term(term):
-    # 1. deal with the coefficient
-    #ex. X^2, +Y^3, -X, ...
-    if "*" not in term:
-        if term[0] == '-':
-            if term[1:].isdigit(): #pure number without variable
-                return int(term), {} 
-            else:
-                coefficient = -1
-                variables = term[1:] if len(term) > 1 else ''
-        elif term[0] == '+':
-            if term[1:].isdigit():
-                return int(term), {} 
-            else:
-                coefficient = 1
-                variables = term[1:] if len(term) > 1 else '' 
-        else: # a term starts with a letter
-            coefficient = 1 if term[0].isalpha() else int(term)
-            variables = term if term[0].isalpha() else ''
-    #ex. 3*X^2 (split to)=> 3, X^2
-    else:
-        coefficient_part, variables = term.split("*")
-        coefficient = int(coefficient_part)
-    
-    # 2. deal with variables and their exponents
-    # variables: ex. XY^2 (split to)=> var_dict: ex. {X:1, Y:2}
-    var_dict = {}
-    current_var = ""
-    for i, char in enumerate(variables):
-        #check if the char is an english letter
-        if char.isalpha():
-            current_var = char
-            var_dict[current_var] = 1
-        elif char == "^":
-            exp_end_index = i + 1 #start from the begin
-            #find the end-index for the digits(exp)
-            while (exp_end_index < len(variables)) and (variables[exp_end_index].isdigit()):
-                exp_end_index += 1
-            var_dict[current_var] = int(variables[i+1: exp_end_index]) if (exp_end_index > i + 1) else 1 #the numbers after "^"
-    #print(coefficient)
-    return coefficient, var_dict
-
-# multiply two terms
-def multiply_terms(term1, term2):
-    '''
-    term1: 2*Y
-    term2: XZ^2
-    '''
-    #coef: coefficient of a term
-    #vars: a dict of the pairs (var:power)
-    '''
-    coef1: 2, vars1: {Y:1}
-    coef2: 1, vars2: {X:1,Z:2}
-    '''
-    coef1, vars1 = parse_term(term1) 
-    coef2, vars2 = parse_term(term2)
-    
-    '''
-    new_coef: 2*1 = 2
-    '''
-    new_coef = coef1 * coef2
-    #init the result vars: dict of the pairs (var:power)
-    new_vars = vars1.copy()
-    
-    #items() => extract each pair of (key:value) in a dict
-    '''
-    new_vars: {Y:1}
-    new_vars: {Y:1,X:1}
-    new_vars: {Y:1,X:1,Z:2} => YXZ^2
-    '''
-    for var, exp in vars2.items():
-        if var in new_vars:
-            new_vars[var] += exp
-        else:
-            new_vars[var] = exp
-    
-    # 2*YXZ^2
-    return new_coef, new_vars
+import argparse
+import os
+import re
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 # Function to convert the parsed terms back to a string format
 def term_to_string(coef, vars):
@@ -125,99 +32,631 @@ def term_to_string(coef, vars):
     else:
         return f"{coef}*{var_str}" if var_str else f"{coef}"
 
+# Single-pass compiler for the whole input, ex. (X+2*Y)(2*X^2-Y^2+Z) or the bonus one (X+2Y)(2X2-Y2+Z)
+# one compiled regex cuts the input into tokens, and a small state machine turns the tokens
+# directly into monomial records: [[(coef, var_dict), ...] for every (?????)]
+# => the input is scanned only once
+TOKEN_PATTERN = re.compile(r"(?P<number>[0-9]+)|(?P<var>[A-Za-z])|(?P<op>[-+*^()])|(?P<space>\s+)|(?P<bad>.)", re.DOTALL)
+
+class PolynomialSyntaxError(ValueError):
+    def __init__(self, message, position):
+        super().__init__(f"{message} at position {position}")
+        self.position = position
+
+# states of the state machine
+OUTSIDE = 0       #between the (?????), waiting for "("
+TERM_START = 1    #a new term: sign, coefficient or variable
+AFTER_SIGN = 2    #after "+"/"-": coefficient or variable
+AFTER_COEF = 3    #after the coefficient: "*", variable, or the end of the term
+AFTER_STAR = 4    #after "*": variable
+AFTER_VAR = 5     #after a variable: "^", exponent (bonus), variable, or the end of the term
+AFTER_CARET = 6   #after "^": exponent
+AFTER_EXP = 7     #after an exponent: variable, or the end of the term
+AFTER_FACTOR = 8  #after ")": "(" or "*"
+
+def compile_polynomials(source):
+    #source: a string, or a file object (ex. open(...), sys.stdin)
+    text = source.read() if hasattr(source, "read") else source
+
+    factors = []
+    terms = None
+    state = OUTSIDE
+    sign, coef, var_dict, current_var = 1, None, {}, None
+
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        token = match.group()
+        position = match.start()
+        if kind == "space":
+            continue
+        if kind == "bad":
+            raise PolynomialSyntaxError(f"Unexpected character {token!r}", position)
+
+        if state in (OUTSIDE, AFTER_FACTOR):
+            if token == "(":
+                terms = []
+                state = TERM_START
+            elif (token == "*") and (state == AFTER_FACTOR):
+                state = OUTSIDE
+            else:
+                raise PolynomialSyntaxError(f"Expected '(' but found {token!r}", position)
+
+        elif kind == "number":
+            if state in (TERM_START, AFTER_SIGN):
+                coef = int(token)
+                state = AFTER_COEF
+            elif state in (AFTER_VAR, AFTER_CARET):
+                #X^2 or the bonus X2
+                var_dict[current_var] += int(token) - 1
+                state = AFTER_EXP
+            else:
+                raise PolynomialSyntaxError(f"Unexpected number {token!r}", position)
+
+        elif kind == "var":
+            if state == AFTER_CARET:
+                raise PolynomialSyntaxError("Expected an exponent after '^'", position)
+            #XY or X^2Y: a new variable of the same term (X...X adds up the exponents)
+            current_var = token
+            var_dict[current_var] = var_dict.get(current_var, 0) + 1
+            state = AFTER_VAR
+
+        elif token == "*":
+            if state not in (AFTER_COEF, AFTER_VAR, AFTER_EXP):
+                raise PolynomialSyntaxError("Unexpected '*'", position)
+            state = AFTER_STAR
+
+        elif token == "^":
+            if state != AFTER_VAR:
+                raise PolynomialSyntaxError("Unexpected '^'", position)
+            state = AFTER_CARET
+
+        elif token in "+-":
+            if state in (AFTER_COEF, AFTER_VAR, AFTER_EXP):
+                #the end of the previous term
+                terms.append((sign * (1 if coef is None else coef), var_dict))
+                coef, var_dict = None, {}
+            elif state != TERM_START:
+                raise PolynomialSyntaxError(f"Unexpected {token!r}", position)
+            sign = -1 if token == "-" else 1
+            state = AFTER_SIGN
+
+        elif token == ")":
+            if state not in (AFTER_COEF, AFTER_VAR, AFTER_EXP):
+                raise PolynomialSyntaxError("Unexpected ')'", position)
+            terms.append((sign * (1 if coef is None else coef), var_dict))
+            factors.append(terms)
+            sign, coef, var_dict = 1, None, {}
+            state = AFTER_FACTOR
+
+        else: # "(" inside a (?????)
+            raise PolynomialSyntaxError("Unexpected '('", position)
+
+    if state != AFTER_FACTOR:
+        raise PolynomialSyntaxError("Unexpected end of input", len(text))
+    return factors
+
+# A polynomial stored natively (no strings inside):
+# 1. a fixed variable ordering, ex. ('X', 'Y', 'Z'), always sorted by alphabet
+# 2. each monomial is packed into ONE int: variable k owns the bits [k*width, (k+1)*width)
+#    ex. width = 4, X^2YZ^3 => (3 << 8) | (1 << 4) | 2
+#    => multiplying two monomials is just adding two ints (no carry if width is big enough)
+# 3. terms: a dict {packed monomial: coefficient}
+class Polynomial:
+    def __init__(self, variables, width, terms=None):
+        self.variables = tuple(variables)
+        self.width = width
+        self.terms = {} if terms is None else terms
+
+    # {X:2, Z:1} => packed int
+    def pack(self, var_dict):
+        key = 0
+        for k, var in enumerate(self.variables):
+            key |= var_dict.get(var, 0) << (k * self.width)
+        return key
+
+    # packed int => {X:2, Z:1} (variables with exponent 0 are left out)
+    def unpack(self, key):
+        mask = (1 << self.width) - 1
+        var_dict = {}
+        for var in self.variables:
+            exp = key & mask
+            if exp:
+                var_dict[var] = exp
+            key >>= self.width
+        return var_dict
+
+    # build a polynomial from parsed terms [(coef, var_dict), ...]
+    # note: a zero coefficient is kept here on purpose, the original version also kept it
+    # until the end of the multiplication (it decides where a new term shows up in the output)
+    @classmethod
+    def from_terms(cls, parsed_terms, variables, width):
+        poly = cls(variables, width)
+        for coef, var_dict in parsed_terms:
+            key = poly.pack(var_dict)
+            poly.terms[key] = poly.terms.get(key, 0) + coef
+        return poly
+
+    # the constant polynomial 1
+    @classmethod
+    def one(cls, variables, width):
+        return cls(variables, width, {0: 1})
+
+    def __mul__(self, other):
+        if (self.variables != other.variables) or (self.width != other.width):
+            raise ValueError("Polynomials must share the same variable ordering and width!")
+
+        # same loop order as before: each current term (outer) times each term of other (inner)
+        # so the terms come out in the same order
+        new_terms = {}
+        for key1, coef1 in self.terms.items():
+            for key2, coef2 in other.terms.items():
+                key = key1 + key2
+                new_terms[key] = new_terms.get(key, 0) + coef1 * coef2
+        #remove the zero terms
+        new_terms = {k: v for k, v in new_terms.items() if v != 0}
+        return Polynomial(self.variables, self.width, new_terms)
+
+    # serialize once at the end, ex. 2*X^3-XY^2+XZ
+    def to_string(self):
+        term_strs = []
+        for key, coef in self.terms.items():
+            term_str = term_to_string(coef, self.unpack(key))
+            if term_str:
+                if term_strs and (term_str[0] != "-"):
+                    term_strs.append("+")
+                term_strs.append(term_str)
+        return "".join(term_strs)
+
+# parse every (?????) only once => [[(coef, var_dict), ...], ...]
+def parse_factors(polynomials):
+    return compile_polynomials("".join(f"({poly})" for poly in polynomials))
+
+# the exponent of a var in the product <= sum of its max exponent in every factor
+# return {var: that upper bound}
+def max_total_exponents(parsed_factors):
+    max_total_exp = {}
+    for parsed_terms in parsed_factors:
+        factor_max_exp = {}
+        for coef, var_dict in parsed_terms:
+            for var, exp in var_dict.items():
+                factor_max_exp[var] = max(factor_max_exp.get(var, 0), exp)
+        for var, exp in factor_max_exp.items():
+            max_total_exp[var] = max_total_exp.get(var, 0) + exp
+    return max_total_exp
+
+# decide the variable ordering and the width (bits per exponent) for a product of parsed factors
+def polynomial_ring(parsed_factors):
+    max_total_exp = max_total_exponents(parsed_factors)
+    variables = tuple(sorted(max_total_exp))
+    width = max(max_total_exp.values(), default=1).bit_length() or 1
+    return variables, width
+
+# multiply a list of factors in a balanced binary tree: ((f1*f2)*(f3*f4))*((f5*f6)*(f7*f8))
+# => the two sides of every MUL have about the same size, instead of (huge result)*(small factor)
+def product_tree(factors):
+    if len(factors) == 1:
+        return factors[0]
+    middle = len(factors) // 2
+    return product_tree(factors[:middle]) * product_tree(factors[middle:])
+
+# Dense path (Kronecker substitution):
+# a monomial X^a Y^b Z^c becomes the single power t^(a*Dy*Dz + b*Dz + c), where Dv = (max exponent of v) + 1
+# => a polynomial with a few variables becomes a univariate coefficient array, and MUL becomes a convolution
+# (no carry between the variables, because every exponent in the product stays below its base)
+DENSE_MAX_VARIABLES = 3
+DENSE_MAX_SIZE = 1 << 24 #max length of the dense coefficient array
+FFT_MIN_WORK = 1 << 16   #use the FFT only when len(a)*len(b) is at least this big
+
+# the base (radix) of every variable, in the same order as the variables
+def kronecker_bases(variables, max_total_exp):
+    return [max_total_exp[var] + 1 for var in variables]
+
+# the stride of every variable: the last variable moves by 1, the first variable moves the most
+def kronecker_strides(bases):
+    strides = []
+    stride = 1
+    for base in reversed(bases):
+        strides.append(stride)
+        stride *= base
+    return strides[::-1]
+
+# should multiply_polynomials(mode="auto") take the dense path?
+# only when there are a few variables, the dense array is not too long,
+# and every coefficient of the product fits in int64 (then the convolution runs in numpy, not in big ints)
+def is_dense_friendly(parsed_factors, variables):
+    if len(variables) > DENSE_MAX_VARIABLES:
+        return False
+    size = 1
+    for base in kronecker_bases(variables, max_total_exponents(parsed_factors)):
+        size *= base
+    if size > DENSE_MAX_SIZE:
+        return False
+
+    #|any coefficient of the product| <= product of (sum of |coefficients|) of every factor
+    coef_bound = 1
+    for parsed_terms in parsed_factors:
+        coef_bound *= sum(abs(coef) for coef, var_dict in parsed_terms)
+    return coef_bound < (1 << 63)
+
+# Polynomial => 1D coefficient array (int64 if the coefficients fit, otherwise python ints)
+def to_dense(poly, bases):
+    strides = kronecker_strides(bases)
+    indexed_terms = {}
+    for key, coef in poly.terms.items():
+        var_dict = poly.unpack(key)
+        index = sum(var_dict.get(var, 0) * stride for var, stride in zip(poly.variables, strides))
+        indexed_terms[index] = coef
+
+    size = max(indexed_terms, default=0) + 1
+    fits = all(-(1 << 63) < coef < (1 << 63) for coef in indexed_terms.values())
+    coefs = np.zeros(size, dtype=np.int64 if fits else object)
+    for index, coef in indexed_terms.items():
+        coefs[index] = coef
+    return coefs
+
+# 1D coefficient array => Polynomial, the terms go from the highest power of t to the lowest
+# ex. X^3+5*X^2+7*X+2
+def from_dense(coefs, variables, width, bases):
+    strides = kronecker_strides(bases)
+    poly = Polynomial(variables, width)
+    for index in np.flatnonzero(coefs)[::-1]:
+        var_dict = {}
+        rest = int(index)
+        for var, stride in zip(variables, strides):
+            exp, rest = divmod(rest, stride)
+            if exp:
+                var_dict[var] = exp
+        poly.terms[poly.pack(var_dict)] = int(coefs[index])
+    return poly
+
+# Huge coefficients (multi-modular): do the whole product modulo many small primes, where every
+# convolution is an exact float64 FFT, then rebuild the coefficients with the Chinese remainder theorem
+# (no big int until the very end)
+FFT_EXACT_BITS = 44 #n * p^2 must stay below 2^44 so that the rounded FFT result is exact
+PRIMES = {}         #bits => all the primes below 2^bits, the biggest first
+
+# the biggest primes below 2^bits whose product is bigger than `limit`
+def word_primes(bits, limit):
+    if bits not in PRIMES:
+        sieve = np.ones(1 << bits, dtype=bool)
+        sieve[:2] = False
+        for i in range(2, int((1 << bits) ** 0.5) + 1):
+            if sieve[i]:
+                sieve[i * i::i] = False
+        PRIMES[bits] = np.flatnonzero(sieve)[::-1].astype(np.int64)
+    product = 1
+    for count, prime in enumerate(PRIMES[bits].tolist(), 1):
+        product *= prime
+        if product > limit:
+            return PRIMES[bits][:count]
+    return None #not enough primes of this size
+
+# convolution of every row of a with the same row of b, modulo the prime of the row
+def modular_convolve(a, b, primes):
+    n = a.shape[1] + b.shape[1] - 1
+    if min(a.shape[1], b.shape[1]) <= 16:
+        #short factor: add the shifted rows (exact in int64)
+        if a.shape[1] < b.shape[1]:
+            a, b = b, a
+        product = np.zeros((len(primes), n), dtype=np.int64)
+        for j in range(b.shape[1]):
+            product[:, j:j + a.shape[1]] += a * b[:, j:j + 1]
+        return product % primes[:, np.newaxis]
+
+    size = 1 << (n - 1).bit_length()
+    product = np.fft.irfft(np.fft.rfft(a.astype(np.float64), size) * np.fft.rfft(b.astype(np.float64), size), size)[:, :n]
+    rounded = np.rint(product)
+    if np.max(np.abs(product - rounded), initial=0.0) < 0.25:
+        return rounded.astype(np.int64) % primes[:, np.newaxis]
+    #the FFT is not precise enough: direct convolution row by row (p^2 * n still fits in int64)
+    return np.array([np.convolve(row_a, row_b) % prime for row_a, row_b, prime in zip(a, b, primes)])
+
+def modular_product_tree(residues, primes):
+    if len(residues) == 1:
+        return residues[0]
+    middle = len(residues) // 2
+    return modular_convolve(modular_product_tree(residues[:middle], primes),
+                            modular_product_tree(residues[middle:], primes), primes)
+
+# Chinese remainder theorem: residues[i] = x mod primes[i] => x (python ints, between -M/2 and M/2)
+# two moduli at a time, in int64 while the product of two moduli fits, then with python ints
+def crt_combine(residues, primes):
+    moduli = primes
+    while len(moduli) > 1 and int(moduli.max()) ** 2 < (1 << 62):
+        half = len(moduli) // 2
+        m1, m2 = moduli[:half, np.newaxis], moduli[half:2 * half, np.newaxis]
+        x1, x2 = residues[:half], residues[half:2 * half]
+        inverses = np.array([pow(int(p), -1, int(q)) for p, q in zip(m1[:, 0], m2[:, 0])], dtype=np.int64)
+        #x = x1 + m1 * ((x2 - x1) / m1 mod m2)
+        combined = x1 + m1 * ((x2 - x1) % m2 * inverses[:, np.newaxis] % m2)
+        residues = np.vstack([combined, residues[2 * half:]])
+        moduli = np.concatenate([(m1 * m2)[:, 0], moduli[2 * half:]])
+
+    nodes = [(np.array(row.tolist(), dtype=object), int(modulus)) for row, modulus in zip(residues, moduli)]
+    while len(nodes) > 1:
+        combined_nodes = []
+        for (x1, m1), (x2, m2) in zip(nodes[0::2], nodes[1::2]):
+            combined_nodes.append((x1 + m1 * ((x2 - x1) * pow(m1, -1, m2) % m2), m1 * m2))
+        if len(nodes) % 2:
+            combined_nodes.append(nodes[-1])
+        nodes = combined_nodes
+    x, modulus = nodes[0]
+    half = modulus // 2
+    return np.array([value - modulus if value > half else value for value in x], dtype=object)
+
+# exact product of coefficient arrays whose product has coefficients up to `bound` (in absolute value)
+def multimodular_product(arrays, bound):
+    n = sum(len(coefs) for coefs in arrays) - len(arrays) + 1
+    #the largest primes the FFT can handle exactly, smaller ones if there are not enough of them
+    bits = max(8, (FFT_EXACT_BITS - n.bit_length()) // 2)
+    primes = word_primes(bits, 2 * bound)
+    while primes is None:
+        bits += 1
+        primes = word_primes(bits, 2 * bound)
+
+    residues = []
+    for coefs in arrays:
+        if coefs.dtype == object:
+            residues.append(np.array([[int(coef) % prime for coef in coefs] for prime in primes.tolist()], dtype=np.int64))
+        else:
+            residues.append(coefs[np.newaxis, :] % primes[:, np.newaxis])
+    return crt_combine(modular_product_tree(residues, primes), primes)
+
+# |any coefficient of the product| <= product of (sum of |coefficients|) of every array
+def coefficient_bound(arrays):
+    bound = 1
+    for coefs in arrays:
+        bound *= sum(abs(int(coef)) for coef in coefs)
+    return bound
+
+# exact integer convolution of two coefficient arrays
+def exact_convolve(a, b):
+    max_a = max(abs(int(a.max())), abs(int(a.min())))
+    max_b = max(abs(int(b.max())), abs(int(b.min())))
+    #no coefficient of the product can be bigger than this
+    bound = max_a * max_b * min(len(a), len(b))
+    if bound == 0:
+        return np.zeros(len(a) + len(b) - 1, dtype=np.int64)
+
+    # 1. small enough for float64: FFT, then round back to ints
+    if (bound < (1 << 40)) and (len(a) * len(b) >= FFT_MIN_WORK):
+        n = len(a) + len(b) - 1
+        size = 1 << (n - 1).bit_length()
+        product = np.fft.irfft(np.fft.rfft(a.astype(np.float64), size) * np.fft.rfft(b.astype(np.float64), size), size)[:n]
+        rounded = np.rint(product)
+        #the rounding error must stay far from 0.5, otherwise don't trust the FFT
+        if np.max(np.abs(product - rounded), initial=0.0) < 0.25:
+            return rounded.astype(np.int64)
+    # 2. fits in int64: direct convolution (no overflow is possible)
+    if bound < (1 << 63):
+        return np.convolve(a.astype(np.int64), b.astype(np.int64))
+    # 3. huge coefficients: multi-modular
+    return multimodular_product([a, b], bound)
+
+# product tree for coefficient arrays
+# (if the coefficients of the product can overflow int64: the whole product is multi-modular, one CRT at the end)
+def dense_product_tree(arrays, check_bound=True):
+    if check_bound and coefficient_bound(arrays) >= (1 << 63):
+        return multimodular_product(arrays, coefficient_bound(arrays))
+    if len(arrays) == 1:
+        return arrays[0]
+    middle = len(arrays) // 2
+    return exact_convolve(dense_product_tree(arrays[:middle], False), dense_product_tree(arrays[middle:], False))
+
+# a small LRU cache: {key: value}, the least recently used key is dropped when it is full
+class LRUCache:
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    #return None if the key is not in the cache
+    #count=False: only a probe, not counted as a hit or a miss
+    def get(self, key, count=True):
+        if key not in self.items:
+            if count:
+                self.misses += 1
+            return None
+        if count:
+            self.hits += 1
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.max_size:
+            self.items.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.items),
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+# Memoized engine (mode="memo"): the same factors show up again and again, ex. (X+Y) dozens of times
+# 1. every factor is canonicalized: like terms merged, zero terms removed, terms sorted
+#    => ((monomial, coef), ...) with monomial = ((var, exp), ...), it doesn't depend on the ring
+# 2. identical factors are grouped: (X+Y)(X+Y)...(X+Y) => (X+Y)^n by squaring, O(log n) MULs
+# 3. the distinct factors are sorted, and every prefix of the sorted factor multiset is cached,
+#    so (A)(B)(C) and (C)(A)(B)(D) share the product of {A, B, C}
+def canonical_factor(parsed_terms):
+    merged = {}
+    for coef, var_dict in parsed_terms:
+        monomial = tuple(sorted((var, exp) for var, exp in var_dict.items() if exp))
+        merged[monomial] = merged.get(monomial, 0) + coef
+    return tuple(sorted((monomial, coef) for monomial, coef in merged.items() if coef != 0))
+
+# multiply two canonical polynomials (by the packed Polynomial engine)
+def multiply_canonical(a, b):
+    parsed_factors = [[(coef, dict(monomial)) for monomial, coef in poly] for poly in (a, b)]
+    variables, width = polynomial_ring(parsed_factors)
+    product = (Polynomial.from_terms(parsed_factors[0], variables, width)
+               * Polynomial.from_terms(parsed_factors[1], variables, width))
+    return tuple(sorted((tuple(sorted(product.unpack(key).items())), coef) for key, coef in product.terms.items()))
+
+class PolynomialCache:
+    ONE = (((), 1),)
+
+    def __init__(self, max_size=1024):
+        self.cache = LRUCache(max_size)
+        self.multiplications = 0
+
+    def multiply(self, a, b):
+        self.multiplications += 1
+        return multiply_canonical(a, b)
+
+    # factor^exponent by squaring, (factor, exponent) => canonical polynomial
+    def power(self, factor, exponent):
+        if exponent == 1:
+            return factor
+        key = ("power", factor, exponent)
+        result = self.cache.get(key)
+        if result is None:
+            half = self.power(factor, exponent // 2)
+            result = self.multiply(half, half)
+            if exponent % 2 == 1:
+                result = self.multiply(result, factor)
+            self.cache.put(key, result)
+        return result
+
+    # the product of all the parsed factors => canonical polynomial
+    def product(self, parsed_factors):
+        #count the identical factors, then sort them => the sorted factor multiset
+        counts = {}
+        for parsed_terms in parsed_factors:
+            factor = canonical_factor(parsed_terms)
+            counts[factor] = counts.get(factor, 0) + 1
+        multiset = tuple(sorted(counts.items()))
+
+        #find the longest prefix of the multiset that is already cached
+        result = self.ONE
+        start = 0
+        for end in range(len(multiset), 0, -1):
+            cached = self.cache.get(("product", multiset[:end]), count=False)
+            if cached is not None:
+                result, start = cached, end
+                break
+        #one hit or miss per product: a hit only if the whole product was cached
+        if start == len(multiset):
+            self.cache.hits += 1
+        else:
+            self.cache.misses += 1
+
+        #MUL the rest, and cache every new prefix
+        for end in range(start + 1, len(multiset) + 1):
+            factor, count = multiset[end - 1]
+            factor_power = self.power(factor, count)
+            result = factor_power if result == self.ONE else self.multiply(result, factor_power)
+            self.cache.put(("product", multiset[:end]), result)
+        return result
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats["multiplications"] = self.multiplications
+        return stats
+
+# the cache used by multiply_factors(mode="memo"), shared by all the expressions in this process
+POLYNOMIAL_CACHE = PolynomialCache()
+
+# canonical polynomial => string, the terms go from the last monomial to the first (ex. Y^2, XY, X^2, 1)
+def canonical_to_string(poly):
+    result_str = []
+    for monomial, coef in reversed(poly):
+        term_str = term_to_string(coef, dict(monomial))
+        if result_str and (term_str[0] != "-"):
+            result_str.append("+")
+        result_str.append(term_str)
+    return "".join(result_str)
+
 # Function to multiply multiple polynomials
-def multiply_polynomials(polynomials):
-    # Start with the first polynomial
-    #key: an empty tuple(a term, ex. ((X,1),(Y,2)) XY^2); value: 1 (coefficient)
-    result_terms = {(): 1}  #the result starting with 1
-    
-    #polynomials: all the (?????)
-    #poly: each (?????), that is a string in a pair of parentheses()
-    poly_counter = 0 #for debugging
-    for poly in polynomials: 
-        #parse a poly to a list of terms
-        poly_terms = parse_polynomial(poly)
-        #print(f"poly terms {poly_counter}: {poly_terms}")
-        #the new terms generated by the multiplication of previous result and current poly
-        new_result_terms = {}
-        
-        #iterate by each key, that is each result_term is a tuple
-        result_terms_counter = 0
-        for result_term in result_terms:
-            #print(f"   result_term {result_terms_counter}: {result_term}")
-            #multiply each term in current poly with the current result term from result_terms
-            term_counter = 0
-            for term in poly_terms:
-                #print(f"     term {term_counter}: {term}")
-                #multiply 2 terms
-                #term_to_string(coef, vars)
-                #dict(result_term): turn the tuple to a dict
-                #ex. result_term == [('X', 1), ('Y', 2)] -> dict(result_term) ==  {'X': 1, 'Y': 2}
-                coef, vars = multiply_terms(term, term_to_string(result_terms[result_term], dict(result_term))) 
-                
-                #sort key(vars is a dict) for a result by multiplying two terms
-                multiplied_key = tuple(sorted(vars.items()))
-                
-                if multiplied_key in new_result_terms:
-                    #already existed
-                    new_result_terms[multiplied_key] += coef
-                else:
-                    #new one(tuple)
-                    new_result_terms[multiplied_key] = coef
-                
-                term_counter += 1
-
-            result_terms_counter += 1
-        
-        #"(current result terms)(poly2)"(ploy3)....
-        #already finished the MUL for "(current result terms)" with a poly
-        #so, copy the new result to the old one => (current result terms)(ploy3)....
-        result_terms = new_result_terms
-        #check a result_terms: if a value of a key is zero, remove this pair
-        result_terms =  {k: v for k, v in result_terms.items() if v != 0}
-        #print(f"   result_terms: {result_terms}")
-        #go to next iteration, MUL for "(current result terms)" with the next poly
-        poly_counter += 1
-    
-    #finish all the MULs, return the format needed
-    #result_terms: dict, {((X,1),(Y,2)):2, ...} that is, 2*XY^2 + ...
-    result = ""
-    for vars, coef in result_terms.items():
-        term_str = term_to_string(coef, dict(vars))
-        if term_str:
-            if (result != "") and (term_str[0] != "-"):
-                result += "+"
-            result += term_str
-    
-    return result
+# mode: "sequential" => (((f1*f2)*f3)*f4)..., the terms come out in the original order
+#       "tree"       => balanced product tree, the subtrees are sent to a process pool
+#                       (same terms as "sequential", but the order of the terms may differ)
+#       "dense"      => Kronecker substitution + exact integer convolution (FFT / int64 / multi-modular),
+#                       the terms are listed from the highest power to the lowest
+#       "auto"       => "dense" for inputs with a few variables, small degrees and int64 coefficients,
+#                       otherwise "sequential"
+#       "memo"       => identical factors by squaring, products cached in POLYNOMIAL_CACHE
+# max_workers: the number of processes for "tree" (None => all the cores, 1 => no pool)
+def multiply_polynomials(polynomials, mode="sequential", max_workers=None):
+    #polynomials: all the (?????), each one is a string in a pair of parentheses()
+    return multiply_factors(parse_factors(polynomials), mode=mode, max_workers=max_workers)
+
+# same as multiply_polynomials, but for factors that are already parsed (ex. by compile_polynomials)
+def multiply_factors(parsed_factors, mode="sequential", max_workers=None):
+    if mode == "memo":
+        return canonical_to_string(POLYNOMIAL_CACHE.product(parsed_factors))
+
+    variables, width = polynomial_ring(parsed_factors)
+    factors = [Polynomial.from_terms(parsed_terms, variables, width) for parsed_terms in parsed_factors]
 
-#convert the bonus input to the standard one
-def bonus_convert_to_standard(input_str):
-    result = ""
-    input_length = len(input_str)
-    can_add_coef = True # avoid: X2Y4 -> X^2*Y^4
-
-    #iterate each char in the input
-    for i in range(input_length):
-        current_char = input_str[i]
-        if current_char.isalpha():
-            #check *
-            if (i > 0) and (input_str[i-1].isdigit()) and can_add_coef:
-                result = result + "*"
-
-            result = result + current_char
-            can_add_coef = False
-
-            #check "^"
-            if (i < input_length - 1) and (input_str[i+1].isdigit()):
-                result = result + "^"
+    if mode == "auto":
+        mode = "dense" if is_dense_friendly(parsed_factors, variables) else "sequential"
+
+    if mode == "sequential":
+        # Start with 1, and MUL the factors one by one: (current result)(poly2)(poly3)....
+        result = Polynomial.one(variables, width)
+        for factor in factors:
+            result = result * factor
+    elif mode == "tree":
+        # start from 1 as well, so the zero terms are removed even if there is only 1 factor
+        factors = [Polynomial.one(variables, width)] + factors
+        workers = max_workers or os.cpu_count() or 1
+        workers = min(workers, len(factors) // 2)
+        if workers <= 1:
+            result = product_tree(factors)
         else:
-            result = result + current_char
-            if current_char == '+' or current_char == '-' or current_char == '(':
-                # the next char might be digits -> coef
-                can_add_coef = True
-    #print(result)
-    return result
+            # cut the factors into `workers` contiguous groups (independent subtrees),
+            # each process multiplies its own subtree, then combine the subtree results in a tree
+            bounds = [len(factors) * k // workers for k in range(workers + 1)]
+            groups = [factors[bounds[k]:bounds[k + 1]] for k in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                subtree_results = list(executor.map(product_tree, groups))
+            result = product_tree(subtree_results)
+    elif mode == "dense":
+        bases = kronecker_bases(variables, max_total_exponents(parsed_factors))
+        coefs = dense_product_tree([to_dense(factor, bases) for factor in factors])
+        result = from_dense(coefs, variables, width, bases)
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    #finish all the MULs, return the format needed
+    return result.to_string()
+
+# compare the running time of the sequential fold with the product tree
+# ex. benchmark_multiply(["X", "X-Y^5", "8*X+Z", "9*Z^2"] * 8)
+def benchmark_multiply(polynomials, modes=("sequential", "tree"), repeat=3):
+    results = {}
+    print("Mode          Best time (s)")
+    print("--------------------------------------")
+    for mode in modes:
+        best_time = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = multiply_polynomials(polynomials, mode=mode)
+            best_time = min(best_time, time.perf_counter() - start)
+        results[mode] = (best_time, result)
+        print(f"{mode:<13} {best_time:.4f}")
+
+    #the product tree only changes the order of the terms => compare the sorted monomial records ("" is 0)
+    answers = [sorted((coef, sorted(var_dict.items())) for coef, var_dict in compile_polynomials(f"({result or 0})")[0])
+               for best_time, result in results.values()]
+    if any(answer != answers[0] for answer in answers):
+        raise AssertionError("The modes give different results!")
+    return results
+
+# the inputs of --benchmark: (name, polynomials, modes, repeat)
+BENCHMARK_CASES = [
+    ("int64 coefficients", ["X+1", "Y-1", "Z+1"] * 20, ("sequential", "tree", "dense"), 3),
+    #the coefficients overflow int64 => the dense mode is multi-modular (sequential: more than a minute)
+    ("huge coefficients", ["X+2", "X^2+3*X+1"] * 3300, ("sequential", "dense"), 1),
+]
+
+def run_benchmarks(cases=BENCHMARK_CASES):
+    for name, polynomials, modes, repeat in cases:
+        print(f"\n{name}: {len(polynomials)} factors")
+        benchmark_multiply(polynomials, modes=modes, repeat=repeat)
 
 #convert a standard output to a bonus one
 def bonus_ouput(str):
@@ -228,24 +667,152 @@ def bonus_ouput(str):
 # Main function to do p1
 def polynomial_multiplication():
     input_str = input("Input the polynomials: ")
-    input_str = input_str.replace(" ", "")
-    input_str = bonus_convert_to_standard(input_str)
-    
-    # Remove the outer parentheses and split by the ")*("
-    # Removes the outer parentheses(the first and last char) from the input.
-    input_str = input_str[1:-1]
-    polynomials = input_str.split(")(")
+    #standard or bonus input => all the (?????) as monomial records, in one pass
+    parsed_factors = compile_polynomials(input_str)
     
     # Multiply all the polynomials
-    result = multiply_polynomials(polynomials)
+    result = multiply_factors(parsed_factors)
     
     #print the result
     print(f"Output Result: {result}")
     #print the bonus result
     print(f"Output Result: {bonus_ouput(result)} (bonus)")
 
-# call the function to do p1
-polynomial_multiplication()
+# the same expression in standard/bonus syntax or with other spaces => the same key
+# (the order of the terms is kept, because it decides the order of the output)
+def normalize_factors(parsed_factors):
+    return tuple(tuple((coef, tuple(sorted((var, exp) for var, exp in var_dict.items() if exp)))
+                       for coef, var_dict in parsed_terms)
+                 for parsed_terms in parsed_factors)
+
+# multiply a group of parsed expressions (runs in a worker process in the batch mode)
+def multiply_expressions(parsed_expressions, mode="sequential"):
+    #no process pool inside a worker process
+    return [multiply_factors(parsed_factors, mode=mode, max_workers=1) for parsed_factors in parsed_expressions]
+
+# a group of expressions sent to a worker process as one task (one task per line costs too much)
+class BatchChunk:
+    def __init__(self):
+        self.expressions = []
+        self.future = None
+
+# Batch mode: one expression per line => one result per line (same order as the input)
+# input_file/output_file: file objects, ex. open(...), sys.stdin, sys.stdout
+# workers > 1: the lines are multiplied by a process pool, chunk_size expressions per task
+# the results are cached by the normalized expression, so a repeated expression is not computed again
+def batch_multiplication(input_file, output_file, mode="sequential", workers=1, bonus=False,
+                         cache_size=10000, chunk_size=64):
+    cache = LRUCache(cache_size)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    #the chunk that is still being filled (not submitted yet)
+    chunk = BatchChunk()
+    #results (str), syntax errors or (chunk, index), waiting to be written in the input order
+    pending = deque()
+    max_pending = 4 * workers * chunk_size
+
+    def submit_chunk():
+        nonlocal chunk
+        if chunk.expressions:
+            chunk.future = executor.submit(multiply_expressions, chunk.expressions, mode)
+            chunk = BatchChunk()
+
+    #write the results at the head of the queue, wait for them if there are too many pending lines
+    def write_results(max_left):
+        while pending:
+            result = pending[0]
+            if isinstance(result, tuple):
+                result_chunk, index = result
+                if result_chunk.future is None:
+                    #the head is in the chunk being filled
+                    if len(pending) <= max_left:
+                        break
+                    submit_chunk()
+                if (len(pending) <= max_left) and (not result_chunk.future.done()):
+                    break
+                result = result_chunk.future.result()[index]
+            pending.popleft()
+            if isinstance(result, PolynomialSyntaxError):
+                output_file.write(f"ERROR: {result}\n")
+            else:
+                output_file.write((bonus_ouput(result) if bonus else result) + "\n")
+            #a reader of the output (ex. a pipe) gets every line as soon as it is ready
+            output_file.flush()
+
+    try:
+        for line in input_file:
+            expression = line.strip()
+            if not expression:
+                #keep the empty line, so the output lines match the input lines
+                pending.append("")
+            else:
+                try:
+                    parsed_factors = compile_polynomials(expression)
+                except PolynomialSyntaxError as error:
+                    pending.append(error)
+                else:
+                    key = normalize_factors(parsed_factors)
+                    result = cache.get(key)
+                    if result is None:
+                        if executor is None:
+                            #one line is one task: no process pool for "tree" (like multiply_expressions)
+                            result = multiply_factors(parsed_factors, mode=mode, max_workers=1)
+                        else:
+                            #remember where the result will be
+                            chunk.expressions.append(parsed_factors)
+                            result = (chunk, len(chunk.expressions) - 1)
+                            if len(chunk.expressions) >= chunk_size:
+                                submit_chunk()
+                        cache.put(key, result)
+                    pending.append(result)
+            write_results(max_pending)
+        if executor is not None:
+            submit_chunk()
+        write_results(0)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    output_file.flush()
+    return cache
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multiply polynomials, ex. (X+2*Y)(2*X^2-Y^2+Z) or (X+2Y)(2X2-Y2+Z)")
+    parser.add_argument("--batch", metavar="FILE", help="read one expression per line from FILE ('-' for stdin)")
+    parser.add_argument("--output", metavar="FILE", help="write the batch results to FILE (default: stdout)")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes for the batch mode")
+    parser.add_argument("--mode", default="sequential", choices=["sequential", "tree", "dense", "auto", "memo"])
+    parser.add_argument("--bonus", action="store_true", help="write the batch results in the bonus format")
+    parser.add_argument("--cache-size", type=int, default=10000, help="number of results kept in the cache")
+    parser.add_argument("--stats", action="store_true", help="print the cache hit rates to stderr after the batch")
+    parser.add_argument("--benchmark", action="store_true", help="time the modes on BENCHMARK_CASES")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        run_benchmarks()
+        return
+
+    #no --batch: the original interactive p1
+    if args.batch is None:
+        polynomial_multiplication()
+        return
+
+    input_file = sys.stdin if args.batch == "-" else open(args.batch, "r", encoding="utf-8")
+    output_file = sys.stdout if args.output is None else open(args.output, "w", encoding="utf-8")
+    try:
+        result_cache = batch_multiplication(input_file, output_file, mode=args.mode, workers=args.workers,
+                                            bonus=args.bonus, cache_size=args.cache_size)
+        if args.stats:
+            print(f"result cache: {result_cache.stats()}", file=sys.stderr)
+            #only this process is counted (not the worker processes)
+            print(f"polynomial cache: {POLYNOMIAL_CACHE.stats()}", file=sys.stderr)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+# call the function to do p1 (only when this file is run, not when it is imported)
+if __name__ == "__main__":
+    main()
 
 #inputs
 '''
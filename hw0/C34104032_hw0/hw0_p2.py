@@ -1,24 +1,310 @@
+import csv
+import heapq
+import os
+from collections import deque
+
+import numpy as np
+
 # read the input file without leading
+# (the csv module keeps a quoted title like "Hello, World" in one field)
 def read_csv_file(file_path):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
-    data = [line.strip().split(',') for line in lines[1:]]
+    with open(file_path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        next(reader, None) #skip the header
+        data = [row for row in reader]
     return data
 
+# give every distinct name an integer id (in the order they first show up)
+# names: id => name, index: name => id
+def intern_name(name, index, names):
+    name_id = index.get(name)
+    if name_id is None:
+        name_id = len(names)
+        index[name] = name_id
+        names.append(name)
+    return name_id
+
+# The whole file loaded once, column by column (all the queries below work on this, not on strings)
+# - typed columns: year (int), rating (float), revenue (float, nan if blank)
+# - actors/genres/directors are interned into integer ids
+# - the actors (genres) of movie i are actor_ids[actor_offsets[i]:actor_offsets[i+1]] (CSR style)
+class MovieTable:
+    def __init__(self):
+        self.titles = []
+        self.actor_names, self.actor_index = [], {}
+        self.genre_names, self.genre_index = [], {}
+        self.director_names, self.director_index = [], {}
+
+    @property
+    def num_movies(self):
+        return len(self.titles)
+
+    @property
+    def num_actors(self):
+        return len(self.actor_names)
+
+    # the movie of every entry in actor_ids, ex. [0,0,0,0,1,1,1,...]
+    def actor_movies(self):
+        return np.repeat(np.arange(self.num_movies), np.diff(self.actor_offsets))
+
+    # all the (actor id, genre id) pairs of the same movie, as 2 arrays
+    def actor_genre_pairs(self):
+        actor_counts = np.diff(self.actor_offsets)
+        genre_counts = np.diff(self.genre_offsets)
+        entry_movies = self.actor_movies()
+        #every actor entry is repeated once for every genre of its movie
+        repeats = genre_counts[entry_movies]
+        actors = np.repeat(self.actor_ids, repeats)
+        #and walks through the genres of its movie
+        group_starts = np.repeat(np.cumsum(repeats) - repeats, repeats)
+        positions = np.repeat(self.genre_offsets[:-1][entry_movies], repeats) + (np.arange(len(actors)) - group_starts)
+        return actors, self.genre_ids[positions]
+
+# load the csv file into a MovieTable in one pass
+def load_movies(file_path):
+    movies = MovieTable()
+    years, ratings, revenues, director_ids = [], [], [], []
+    actor_ids, actor_offsets = [], [0]
+    genre_ids, genre_offsets = [], [0]
+
+    with open(file_path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file)
+        next(reader, None) #skip the header
+        for row in reader:
+            movies.titles.append(row[1])  # 1: title
+            years.append(int(row[5]))     # 5: year
+            ratings.append(float(row[7])) # 7: rating
+            revenues.append(float(row[9]) if row[9] else np.nan) # 9: revenue, nan if blank
+            director_ids.append(intern_name(row[3], movies.director_index, movies.director_names)) # 3: director
+            for actor in row[4].split('|'): # 4: actor
+                actor_ids.append(intern_name(actor.strip(), movies.actor_index, movies.actor_names))
+            actor_offsets.append(len(actor_ids))
+            for genre in row[2].split('|'): # 2: genre
+                genre_ids.append(intern_name(genre.strip(), movies.genre_index, movies.genre_names))
+            genre_offsets.append(len(genre_ids))
+
+    movies.year = np.array(years, dtype=np.int32)
+    movies.rating = np.array(ratings, dtype=np.float64)
+    movies.revenue = np.array(revenues, dtype=np.float64)
+    movies.director_ids = np.array(director_ids, dtype=np.int32)
+    movies.actor_ids = np.array(actor_ids, dtype=np.int32)
+    movies.actor_offsets = np.array(actor_offsets, dtype=np.int64)
+    movies.genre_ids = np.array(genre_ids, dtype=np.int32)
+    movies.genre_offsets = np.array(genre_offsets, dtype=np.int64)
+    return movies
+
+# Union-find (disjoint set) over the actor ids: find the root with path halving
+def find_root(parent, actor):
+    while parent[actor] != actor:
+        parent[actor] = parent[parent[actor]]
+        actor = parent[actor]
+    return actor
+
+# the connected component of every actor in the collaboration graph (actors in the same movie are connected)
+# one pass over the casts, union by size => no actor-actor adjacency is ever built
+def union_find_components(movies):
+    parent = list(range(movies.num_actors))
+    size = [1] * movies.num_actors
+    actor_ids = movies.actor_ids.tolist()
+    actor_offsets = movies.actor_offsets.tolist()
+
+    for movie in range(movies.num_movies):
+        cast = actor_ids[actor_offsets[movie]:actor_offsets[movie + 1]]
+        if not cast:
+            continue
+        #union every actor of the cast with the first one
+        root = find_root(parent, cast[0])
+        for actor in cast[1:]:
+            other = find_root(parent, actor)
+            if other != root:
+                if size[other] > size[root]:
+                    root, other = other, root
+                parent[other] = root
+                size[root] += size[other]
+
+    #root => component id 0, 1, 2, ...
+    roots = [find_root(parent, actor) for actor in range(movies.num_actors)]
+    return np.unique(np.array(roots, dtype=np.int64), return_inverse=True)[1].astype(np.int32).reshape(-1)
+
+# All the inverted indexes that the queries need, built once from a MovieTable:
+# - actor => movies (CSR): actor_movie_list[actor_movie_offsets[a]:actor_movie_offsets[a+1]], in the file order
+# - actor => genres as a bitmask: bit g of actor_genre_mask[a] is 1 if actor a played in genre g
+# - actor => the first and the last year
+# - director => actors (CSR, no repeated actor): director_actor_list[director_actor_offsets[d]:director_actor_offsets[d+1]]
+# - actor => connected component (union-find), component => actors (CSR)
+# save()/load() keep everything (the table too) in one binary .npz file, so nothing is parsed or rebuilt again
+class MovieIndex:
+    #bump it when the saved arrays change, an old .npz file is rebuilt then
+    FORMAT_VERSION = 2
+    #the arrays saved to the .npz file
+    TABLE_ARRAYS = ['year', 'rating', 'revenue', 'director_ids', 'actor_ids', 'actor_offsets', 'genre_ids', 'genre_offsets']
+    INDEX_ARRAYS = ['actor_movie_list', 'actor_movie_offsets', 'actor_genre_mask', 'actor_first_year', 'actor_last_year',
+                    'director_actor_list', 'director_actor_offsets',
+                    'actor_component', 'component_member_list', 'component_member_offsets']
+    NAME_LISTS = ['titles', 'actor_names', 'genre_names', 'director_names']
+
+    def __init__(self, movies):
+        self.movies = movies
+
+    @classmethod
+    def build(cls, movies):
+        index = cls(movies)
+        num_actors = movies.num_actors
+        entry_movies = movies.actor_movies()
+
+        # 1. actor => movies (a stable sort keeps the file order of the movies)
+        order = np.argsort(movies.actor_ids, kind='stable')
+        index.actor_movie_list = entry_movies[order]
+        index.actor_movie_offsets = np.concatenate(([0], np.cumsum(np.bincount(movies.actor_ids, minlength=num_actors))))
+
+        # 2. actor => genres bitmask (64 genres per uint64 word)
+        actors, genres = movies.actor_genre_pairs()
+        num_words = len(movies.genre_names) // 64 + 1
+        index.actor_genre_mask = np.zeros((num_actors, num_words), dtype=np.uint64)
+        bits = np.left_shift(np.uint64(1), (genres % 64).astype(np.uint64))
+        np.bitwise_or.at(index.actor_genre_mask, (actors, genres // 64), bits)
+
+        # 3. actor => the first and the last year
+        entry_years = movies.year[entry_movies]
+        index.actor_first_year = np.full(num_actors, np.iinfo(np.int32).max, dtype=np.int32)
+        index.actor_last_year = np.full(num_actors, np.iinfo(np.int32).min, dtype=np.int32)
+        np.minimum.at(index.actor_first_year, movies.actor_ids, entry_years)
+        np.maximum.at(index.actor_last_year, movies.actor_ids, entry_years)
+
+        # 4. director => actors: every (director, actor) pair as one int, then remove the repeated pairs
+        directors = movies.director_ids[entry_movies].astype(np.int64)
+        pairs = np.unique(directors * num_actors + movies.actor_ids)
+        index.director_actor_list = (pairs % num_actors).astype(np.int32)
+        index.director_actor_offsets = np.concatenate(([0], np.cumsum(np.bincount(pairs // num_actors, minlength=len(movies.director_names)))))
+
+        # 5. connected components of the collaboration graph
+        index.actor_component = union_find_components(movies)
+        index.component_member_list = np.argsort(index.actor_component, kind='stable').astype(np.int32)
+        index.component_member_offsets = np.concatenate(([0], np.cumsum(np.bincount(index.actor_component))))
+        return index
+
+    # the movies of an actor (ids)
+    def movies_of(self, actor):
+        return self.actor_movie_list[self.actor_movie_offsets[actor]:self.actor_movie_offsets[actor + 1]]
+
+    # everyone connected to the actor (directly or indirectly), the actor included: just one slice
+    def component_of(self, actor):
+        component = self.actor_component[actor]
+        return self.component_member_list[self.component_member_offsets[component]:self.component_member_offsets[component + 1]]
+
+    # the actors within k hops of the actor (k=1: the direct collaborators), the actor not included
+    # BFS by a deque over the CSR arrays: actor => movies => actors
+    def collaborators_within(self, actor, k):
+        actor_ids = self.movies.actor_ids
+        actor_offsets = self.movies.actor_offsets
+        hops = {actor: 0}
+        visited_movies = set()
+        queue = deque([actor])
+        while queue:
+            current_actor = queue.popleft()
+            if hops[current_actor] == k:
+                continue
+            for movie in self.movies_of(current_actor).tolist():
+                if movie in visited_movies:
+                    continue
+                visited_movies.add(movie)
+                for other in actor_ids[actor_offsets[movie]:actor_offsets[movie + 1]].tolist():
+                    if other not in hops:
+                        hops[other] = hops[current_actor] + 1
+                        queue.append(other)
+        del hops[actor]
+        return hops
+
+    # the number of genres of every actor (count the 1 bits of the bitmask)
+    def actor_genre_counts(self):
+        return np.unpackbits(self.actor_genre_mask.view(np.uint8), axis=1).sum(axis=1)
+
+    # the number of unique actors of every director
+    def director_actor_counts(self):
+        return np.diff(self.director_actor_offsets)
+
+    def save(self, path):
+        arrays = {name: getattr(self.movies, name) for name in self.TABLE_ARRAYS}
+        arrays.update({name: getattr(self, name) for name in self.INDEX_ARRAYS})
+        arrays.update({name: np.array(getattr(self.movies, name), dtype=str) for name in self.NAME_LISTS})
+        arrays['format_version'] = np.array(self.FORMAT_VERSION)
+        #write to a temp file first, so a half written index is never loaded
+        temp_path = path + '.tmp.npz'
+        np.savez(temp_path, **arrays)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        movies = MovieTable()
+        with np.load(path, allow_pickle=False) as arrays:
+            if ('format_version' not in arrays) or (int(arrays['format_version']) != cls.FORMAT_VERSION):
+                raise ValueError(f"{path} was saved by another version of MovieIndex")
+            for name in cls.TABLE_ARRAYS:
+                setattr(movies, name, arrays[name])
+            for name in cls.NAME_LISTS:
+                setattr(movies, name, arrays[name].tolist())
+            index = cls(movies)
+            for name in cls.INDEX_ARRAYS:
+                setattr(index, name, arrays[name])
+        #name => id
+        movies.actor_index = {name: i for i, name in enumerate(movies.actor_names)}
+        movies.genre_index = {name: i for i, name in enumerate(movies.genre_names)}
+        movies.director_index = {name: i for i, name in enumerate(movies.director_names)}
+        return index
+
+# load the MovieIndex of a csv file: from the saved index if it's newer than the csv, otherwise build and save it
+def load_movie_index(file_path, index_path=None):
+    index_path = index_path or os.path.splitext(file_path)[0] + '.index.npz'
+    if os.path.exists(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(file_path):
+        try:
+            return MovieIndex.load(index_path)
+        except ValueError:
+            pass #an old index file, build it again
+    index = MovieIndex.build(load_movies(file_path))
+    index.save(index_path)
+    return index
+
+# Dense-rank top-k with ties: the k largest DISTINCT values, and every id that has one of them
+# values: one number per id (ex. the number of actors of every director)
+# return [(rank, value, ids in ascending order), ...], rank 1 is the largest value
+# no full sort: partition out the biggest m values (m doubles until they contain k distinct values),
+# then one pass over the values picks everything >= the k-th distinct value
+def top_k_with_ties(values, k):
+    values = np.asarray(values)
+    if values.dtype.kind in 'ub':
+        #unsigned counts: make them signed, so -values below doesn't wrap around
+        values = values.astype(np.int64)
+    if (len(values) == 0) or (k <= 0):
+        return []
+
+    m = min(k, len(values))
+    while True:
+        largest = np.partition(values, len(values) - m)[len(values) - m:]
+        distinct = np.unique(largest)
+        if (len(distinct) >= k) or (m == len(values)):
+            break
+        m = min(2 * m, len(values))
+    top_values = distinct[::-1][:k]
+
+    #one pass: the ids that made it, then group them by value (a stable sort keeps the ids ascending)
+    ids = np.flatnonzero(values >= top_values[-1])
+    ids = ids[np.argsort(-values[ids], kind='stable')]
+    bounds = np.searchsorted(-values[ids], -top_values, side='right')
+    starts = np.concatenate(([0], bounds[:-1]))
+    return [(rank, value.item(), ids[start:end]) for rank, (value, start, end) in enumerate(zip(top_values, starts, bounds), start=1)]
+
 # Q(1)Top-3 movies with the highest ratings in 2016? 
-def top_3_movies_2016(data):
-    #read the movies in 2016
-    movies_2016 = [row for row in data if row[5] == '2016']  
-    #sort movies_2016 by rating
-    sorted_movies = sorted(movies_2016, key=lambda x: float(x[7]), reverse=True)  # 7: rating
-    # Find the top 3 distinct rating values
-    top_ratings = sorted(set(float(movie[7]) for movie in sorted_movies), reverse=True)[:3]
+def top_3_movies_2016(index):
+    movies = index.movies
+    #read the movies in 2016 (movie ids, in the file order)
+    movies_2016 = np.flatnonzero(movies.year == 2016)
+    ratings_2016 = movies.rating[movies_2016]
 
     result = []
     
-    for i, rating in enumerate(top_ratings, start=1):
-        # Find all movies with the current rating
-        movies_with_rating = [movie[1] for movie in sorted_movies if float(movie[7]) == rating]
+    # Find the top 3 distinct rating values, and all movies with each of them
+    for i, rating, positions in top_k_with_ties(ratings_2016, 3):
+        movies_with_rating = [movies.titles[movie] for movie in movies_2016[positions]]
         
         # Add to the result
         result.append((i, rating, movies_with_rating))
@@ -26,47 +312,35 @@ def top_3_movies_2016(data):
     #print the result
     print("Rank    Rating     Movies")
     print("--------------------------------------")
-    for rank, rating, movies in result:
-        print(f"{rank:<7} {rating:<10} {', '.join(movies)}")
+    for rank, rating, movies_with_rating in result:
+        print(f"{rank:<7} {rating:<10} {', '.join(movies_with_rating)}")
 
     return
 
 # Q(2)The actor generating the highest average revenue? 
-def actor_highest_avg_revenue(data):
-    #using a dict to record 
+def actor_highest_avg_revenue(index):
+    movies = index.movies
     '''
     The way I define average revenue:
     Sum(the revenues of the movies that the actor worked with) / (number of the movies that the actor worked with)
     note that if the revenue is blank, we should not count the movie in
     '''
-    actor_revenue = {}
-    
-    blank_counter = 0 #used for testing
-    for row in data:
-        #if blank, set -1
-        revenue = float(row[9]) if row[9] else -1  #9: revenue
-        #skip the movie if its revenue is blank
-        if revenue >= 0:
-            actors = row[4].split('|')  # 4: actor
-            actors = [str.strip() for str in actors]
-            
-            #add the revenue to each actor
-            for actor in actors:
-                if actor not in actor_revenue:
-                    actor_revenue[actor] = {'total_revenue': 0, 'movie_count': 0}
-                actor_revenue[actor]['total_revenue'] += revenue
-                actor_revenue[actor]['movie_count'] += 1
-        else:
-            blank_counter += 1
-    #print(f"blank: {blank_counter}")    
-    # Calculate average revenue per actor
-    actor_avg_revenue = {actor: info['total_revenue'] / info['movie_count'] for actor, info in actor_revenue.items()}
-    #print(len(actor_avg_revenue))
-    # Find the highest average revenue
-    highest_avg_revenue = max(actor_avg_revenue.values())
-    #print(sorted(actor_avg_revenue,key=actor_avg_revenue.get))
-    # Find the actor(s) with the highest average revenue
-    highest_avg_actors = [actor for actor, avg_revenue in actor_avg_revenue.items() if avg_revenue == highest_avg_revenue]
+    #the revenue of every actor entry, skip the movie if its revenue is blank(nan)
+    entry_revenue = movies.revenue[movies.actor_movies()]
+    has_revenue = ~np.isnan(entry_revenue)
+    actors = movies.actor_ids[has_revenue]
+
+    #add the revenue to each actor (bincount adds them up in the file order)
+    total_revenue = np.bincount(actors, weights=entry_revenue[has_revenue], minlength=movies.num_actors)
+    movie_count = np.bincount(actors, minlength=movies.num_actors)
+
+    # Calculate average revenue per actor (only the actors with at least 1 revenue)
+    counted = movie_count > 0
+    actor_avg_revenue = np.full(movies.num_actors, -np.inf)
+    actor_avg_revenue[counted] = total_revenue[counted] / movie_count[counted]
+    # Find the highest average revenue, and the actor(s) with it
+    [(rank, highest_avg_revenue, top_actors)] = top_k_with_ties(actor_avg_revenue, 1)
+    highest_avg_actors = [movies.actor_names[actor] for actor in top_actors]
     
     #print the result
     for actor in highest_avg_actors:
@@ -75,49 +349,29 @@ def actor_highest_avg_revenue(data):
     return 
 
 # Q(3)The average rating of Emma Watson’s movies?
-def avg_rating_emma_watson(data):
-    total_rating = 0
-    count = 0
-    
-    for row in data:
-        actors = row[4].split('|')  # 4: actor
-        actors = [str.strip() for str in actors]
-        #print(actors)
-        if 'Emma Watson' in actors:
-            #print(actors)
-            total_rating += float(row[7])  # 7: rating
-            count += 1
-    #print(total_rating)
-    #print(count)
+def avg_rating_emma_watson(index):
+    movies = index.movies
+    emma_watson = movies.actor_index.get('Emma Watson')
+    #the movies with Emma Watson (each movie once, in the file order)
+    emma_movies = np.unique(index.movies_of(emma_watson)) if emma_watson is not None else []
+    #add them up one by one, the same order as the file
+    total_rating = sum(movies.rating[emma_movies].tolist())
+    count = len(emma_movies)
 
     #print the result
     print(total_rating / count if count > 0 else 0)
     return 
 
 # Q(4)Top-3 directors who collaborate with the most actors? 
-def top_3_directors_most_actors(data):
-    director_actor_count = {}
-    
-    for row in data:
-        director = row[3]  # 3: director
-        actors = row[4].split('|')  # 4: actor
-        actors = [str.strip() for str in actors]
-        
-        if director not in director_actor_count:
-            #use a set to store the actors' name for each director
-            director_actor_count[director] = set()
-        director_actor_count[director].update(actors)
+def top_3_directors_most_actors(index):
+    movies = index.movies
+    #the number of unique actors per director
+    director_actor_count = index.director_actor_counts()
     
-    # Sort by the number of unique actors per director
-    sorted_directors = sorted(director_actor_count.items(), key=lambda x: len(x[1]), reverse=True)
-    # Find the top 3 distinct values for the number of actors
-    top_actor_counts = sorted(set(len(actors) for director, actors in sorted_directors), reverse=True)[:3]
-    
-    #print(sorted_directors)
     result = []
-    for i, count in enumerate(top_actor_counts, start=1):
-        # Find directors who have this actor_count
-        curr_directors = [director for director, actors in sorted_directors if len(actors) == count]
+    # Find the top 3 distinct values for the number of actors, and the directors who have them
+    for i, count, top_directors in top_k_with_ties(director_actor_count, 3):
+        curr_directors = [movies.director_names[director] for director in top_directors]
         result.append((i, count, curr_directors))
 
     #print the result
@@ -128,61 +382,32 @@ def top_3_directors_most_actors(data):
     return 
 
 # Q(5)Top-2 actors playing in the most genres of movies?
-def top_2_actors_most_genres(data):
-    actor_genres = {}
-    
-    for row in data:
-        actors = row[4].split('|')  # 4: actor
-        actors = [str.strip() for str in actors]
-        genres = row[2].split('|')  # 2: genre
-        genres = [str.strip() for str in genres]
-        
-        for actor in actors:
-            if actor not in actor_genres:
-                actor_genres[actor] = set()
-            actor_genres[actor].update(genres)
-    
-    # Sort actors by the number of unique genres
-    sorted_actors = sorted(actor_genres.items(), key=lambda x: len(x[1]), reverse=True)
-    # Find the top 2 distinct values for the number of genres
-    top_genre_counts = sorted(set(len(genres) for actor, genres in sorted_actors), reverse=True)[:2]
+def top_2_actors_most_genres(index):
+    movies = index.movies
+    #the number of unique genres per actor
+    actor_genre_count = index.actor_genre_counts()
     
-    #print(sorted_actors)
     result = []
-    for i, count in enumerate(top_genre_counts, start=1):
-        # Find actors who have this genre count
-        actors_with_count = [actor for actor, genres in sorted_actors if len(genres) == count]
+    # Find the top 2 distinct values for the number of genres, and the actors who have them
+    for i, count, top_actors in top_k_with_ties(actor_genre_count, 2):
+        actors_with_count = [movies.actor_names[actor] for actor in top_actors]
         result.append((i, count, actors_with_count))
     #print result
     print("Rank    # of Genres     Actors")
     print("--------------------------------------")
-    for rank, count, actors in result:
-        print(f"{rank:<7} {count:<15} {', '.join(actors)}")
+    for rank, count, actors_with_count in result:
+        print(f"{rank:<7} {count:<15} {', '.join(actors_with_count)}")
     return
 
 # Q(6)actors whose movies lead to the largest maximum gap of years?
-def max_gap_years(data):
-    actor_years = {}
-    
-    for row in data:
-        year = int(row[5])  # 5: year
-        actors = row[4].split('|')  # 4: actor
-        actors = [str.strip() for str in actors]
-        
-        #update an actor's years
-        for actor in actors:
-            if actor not in actor_years:
-                actor_years[actor] = set()
-            actor_years[actor].add(year)
-    
+def max_gap_years(index):
+    movies = index.movies
     # calculate the maximum gap of years for each actor
-    actor_max_gap = {}
-    for actor, years in actor_years.items():
-        actor_max_gap[actor] = max(years) - min(years)
+    actor_max_gap = index.actor_last_year - index.actor_first_year
     
     # Find all actors with the largest gap
-    largest_maximum_gap = max(actor_max_gap.values())
-    actors_with_max_gap = [actor for actor, gap in actor_max_gap.items() if gap == largest_maximum_gap]
+    [(rank, largest_maximum_gap, top_actors)] = top_k_with_ties(actor_max_gap, 1)
+    actors_with_max_gap = [movies.actor_names[actor] for actor in top_actors]
 
     #print the result
     for actor in actors_with_max_gap:
@@ -193,63 +418,242 @@ def max_gap_years(data):
     return
 
 # Q(7)Find all actors who collaborate with Johnny Depp in direct and indirect ways
-def johnny_depp_collaborators(data):
-    actor_collabs = {}
+def johnny_depp_collaborators(index):
+    movies = index.movies
+    target = movies.actor_index.get('Johnny Depp')
     
-    # find each actor's direct collaboration
-    for row in data:
-        actors = row[4].split('|')  # 4: actor
-        actors = [str.strip() for str in actors]
-        
-        for actor in actors:
-            if actor not in actor_collabs:
-                actor_collabs[actor] = set()
-            actor_collabs[actor].update(actors)
-    
-    # find all collaborators (direct and indirect) by a queue(list)
-    collaborators = set()
-    queue = ['Johnny Depp'] #target
-    
-    while queue:
-        current_actor = queue.pop(0)
-        #avoid looping
-        if current_actor in collaborators:
-            continue
-        collaborators.add(current_actor)
-        #add multiple elements after the queue(current_actor's direct collaborators)
-        queue.extend(actor_collabs.get(current_actor))\
+    # find all collaborators (direct and indirect): everyone in the same connected component (union-find)
+    component = index.component_of(target).tolist() if target is not None else []
         
     #remove the target himself
-    collaborators.remove('Johnny Depp')
+    collaborators = {movies.actor_names[actor] for actor in component if actor != target}
     print(collaborators)
     print(f"(with {len(collaborators)} collaborators in total)")
     return
 
-# Load the CSV file
-folder = 'hw0/C34104032_hw0/'
-file_path = 'IMDB-Movie-Data.csv'
-data = read_csv_file(file_path)
-#data = read_csv_file(folder + file_path)
-#print(data)
-
-#1
-print('Q1:')
-top_3_movies_2016(data)
-#2
-print('Q2:')
-actor_highest_avg_revenue(data)
-#3
-print('Q3:')
-avg_rating_emma_watson(data)
-#4
-print('Q4:')
-top_3_directors_most_actors(data)
-#5
-print('Q5:')
-top_2_actors_most_genres(data)
-#6
-print('Q6:')
-max_gap_years(data)
-#7
-print('Q7:')
-johnny_depp_collaborators(data)
+# value => set of keys, ex. {number of actors: {director ids}}, for top-k with ties while the values keep changing
+class CountHistogram:
+    def __init__(self):
+        self.buckets = {}
+
+    # key's value changed from old to new (old is None for a new key)
+    def move(self, key, old, new):
+        if old == new:
+            return
+        if old is not None:
+            bucket = self.buckets[old]
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[old]
+        if new not in self.buckets:
+            self.buckets[new] = set()
+        self.buckets[new].add(key)
+
+    # [(rank, value, keys in ascending order), ...] for the k largest distinct values
+    def top(self, k):
+        return [(rank, value, sorted(self.buckets[value])) for rank, value in enumerate(heapq.nlargest(k, self.buckets), start=1)]
+
+# Incremental version of Q1-Q7: append() one csv row at a time (same columns as read_csv_file),
+# every aggregate is updated in O(cast size), and every answer is ready right after the append (no rescan)
+# - per year: rating => movies
+# - per actor: revenue sum/count, rating sum/count, genre set, first/last year
+# - per director: actor set
+# - union-find components of the actors (the members are merged small into large)
+class IncrementalMovieStats:
+    def __init__(self):
+        self.titles = []
+        self.actor_names, self.actor_index = [], {}
+        self.director_names, self.director_index = [], {}
+        self.year_ratings = {}  #year => {rating: [movie ids]}
+        #per actor (lists indexed by the actor id)
+        self.revenue_total, self.revenue_count = [], []
+        self.rating_total, self.rating_count = [], []
+        self.actor_genres, self.first_year, self.last_year = [], [], []
+        self.parent, self.members = [], []
+        #per director
+        self.director_actors = []
+        #the answers that are kept up to date
+        self.director_actor_histogram = CountHistogram()
+        self.actor_genre_histogram = CountHistogram()
+        self.gap_histogram = CountHistogram()
+        self.revenue_heap = [] #(-average revenue, actor), the old entries are skipped when reading the top
+
+    @classmethod
+    def from_csv(cls, file_path):
+        stats = cls()
+        for row in read_csv_file(file_path):
+            stats.append(row)
+        return stats
+
+    def add_actor(self, name):
+        actor = intern_name(name, self.actor_index, self.actor_names)
+        if actor == len(self.parent):
+            self.revenue_total.append(0)
+            self.revenue_count.append(0)
+            self.rating_total.append(0)
+            self.rating_count.append(0)
+            self.actor_genres.append(set())
+            self.first_year.append(None)
+            self.last_year.append(None)
+            self.parent.append(actor)
+            self.members.append([actor])
+        return actor
+
+    def find_root(self, actor):
+        return find_root(self.parent, actor)
+
+    def union(self, actor1, actor2):
+        root1, root2 = self.find_root(actor1), self.find_root(actor2)
+        if root1 == root2:
+            return
+        #merge the smaller component into the larger one
+        if len(self.members[root1]) < len(self.members[root2]):
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        self.members[root1].extend(self.members[root2])
+        self.members[root2] = []
+
+    def append(self, row):
+        movie = len(self.titles)
+        self.titles.append(row[1]) # 1: title
+        year = int(row[5])         # 5: year
+        rating = float(row[7])     # 7: rating
+        revenue = float(row[9]) if row[9] else -1 # 9: revenue, -1 if blank
+        genres = [genre.strip() for genre in row[2].split('|')] # 2: genre
+        actors = [self.add_actor(actor.strip()) for actor in row[4].split('|')] # 4: actor
+
+        director = intern_name(row[3], self.director_index, self.director_names) # 3: director
+        if director == len(self.director_actors):
+            self.director_actors.append(set())
+
+        # Q1: rating => movies of the year
+        if year not in self.year_ratings:
+            self.year_ratings[year] = {}
+        self.year_ratings[year].setdefault(rating, []).append(movie)
+
+        # Q2: revenue sum/count (an actor listed twice is counted twice, the same as the batch version)
+        if revenue >= 0:
+            for actor in actors:
+                self.revenue_total[actor] += revenue
+                self.revenue_count[actor] += 1
+                heapq.heappush(self.revenue_heap, (-(self.revenue_total[actor] / self.revenue_count[actor]), actor))
+            #drop the old entries once in a while, so the heap doesn't keep growing
+            if len(self.revenue_heap) > 4 * len(self.actor_names) + 16:
+                self.revenue_heap = [entry for entry in self.revenue_heap if -entry[0] == self.average_revenue(entry[1])]
+                heapq.heapify(self.revenue_heap)
+
+        for actor in dict.fromkeys(actors): #each actor once per movie
+            # Q3: rating sum/count
+            self.rating_total[actor] += rating
+            self.rating_count[actor] += 1
+            # Q5: genre set
+            old_count = len(self.actor_genres[actor]) if self.first_year[actor] is not None else None
+            self.actor_genres[actor].update(genres)
+            self.actor_genre_histogram.move(actor, old_count, len(self.actor_genres[actor]))
+            # Q6: first/last year
+            old_gap = None
+            if self.first_year[actor] is None:
+                self.first_year[actor] = self.last_year[actor] = year
+            else:
+                old_gap = self.last_year[actor] - self.first_year[actor]
+                self.first_year[actor] = min(self.first_year[actor], year)
+                self.last_year[actor] = max(self.last_year[actor], year)
+            self.gap_histogram.move(actor, old_gap, self.last_year[actor] - self.first_year[actor])
+
+        # Q4: actor set of the director
+        old_count = len(self.director_actors[director]) if self.director_actors[director] else None
+        self.director_actors[director].update(actors)
+        self.director_actor_histogram.move(director, old_count, len(self.director_actors[director]))
+
+        # Q7: union the cast
+        for actor in actors[1:]:
+            self.union(actors[0], actor)
+
+    def average_revenue(self, actor):
+        return self.revenue_total[actor] / self.revenue_count[actor] if self.revenue_count[actor] else None
+
+    # Q1: [(rank, rating, [titles]), ...]
+    def top_movies(self, year=2016, k=3):
+        ratings = self.year_ratings.get(year, {})
+        return [(rank, rating, [self.titles[movie] for movie in ratings[rating]])
+                for rank, rating in enumerate(heapq.nlargest(k, ratings), start=1)]
+
+    # Q2: ([actors], the highest average revenue)
+    def highest_avg_revenue(self):
+        heap = self.revenue_heap
+        #skip the old entries at the top
+        while heap and -heap[0][0] != self.average_revenue(heap[0][1]):
+            heapq.heappop(heap)
+        if not heap:
+            return [], None
+        highest = -heap[0][0]
+        #pop all the actors with the highest value, then push them back
+        popped = []
+        while heap and -heap[0][0] == highest:
+            popped.append(heapq.heappop(heap))
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        actors = sorted({actor for value, actor in popped if self.average_revenue(actor) == highest})
+        return [self.actor_names[actor] for actor in actors], highest
+
+    # Q3: the average rating of an actor's movies
+    def avg_rating(self, name='Emma Watson'):
+        actor = self.actor_index.get(name)
+        if (actor is None) or (self.rating_count[actor] == 0):
+            return 0
+        return self.rating_total[actor] / self.rating_count[actor]
+
+    # Q4: [(rank, number of actors, [directors]), ...]
+    def top_directors_most_actors(self, k=3):
+        return [(rank, count, [self.director_names[director] for director in directors])
+                for rank, count, directors in self.director_actor_histogram.top(k)]
+
+    # Q5: [(rank, number of genres, [actors]), ...]
+    def top_actors_most_genres(self, k=2):
+        return [(rank, count, [self.actor_names[actor] for actor in actors])
+                for rank, count, actors in self.actor_genre_histogram.top(k)]
+
+    # Q6: ([actors], the largest gap)
+    def max_gap_years(self):
+        top = self.gap_histogram.top(1)
+        if not top:
+            return [], None
+        [(rank, gap, actors)] = top
+        return [self.actor_names[actor] for actor in actors], gap
+
+    # Q7: everyone connected to the actor (the actor not included)
+    def collaborators(self, name='Johnny Depp'):
+        actor = self.actor_index.get(name)
+        if actor is None:
+            return set()
+        return {self.actor_names[other] for other in self.members[self.find_root(actor)] if other != actor}
+
+if __name__ == "__main__":
+    # Load the CSV file
+    folder = 'hw0/C34104032_hw0/'
+    file_path = 'IMDB-Movie-Data.csv'
+    #build the index once, later runs load it from IMDB-Movie-Data.index.npz
+    index = load_movie_index(file_path)
+    #index = load_movie_index(folder + file_path)
+
+    #1
+    print('Q1:')
+    top_3_movies_2016(index)
+    #2
+    print('Q2:')
+    actor_highest_avg_revenue(index)
+    #3
+    print('Q3:')
+    avg_rating_emma_watson(index)
+    #4
+    print('Q4:')
+    top_3_directors_most_actors(index)
+    #5
+    print('Q5:')
+    top_2_actors_most_genres(index)
+    #6
+    print('Q6:')
+    max_gap_years(index)
+    #7
+    print('Q7:')
+    johnny_depp_collaborators(index)
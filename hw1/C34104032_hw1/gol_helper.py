@@ -0,0 +1,578 @@
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# a valid board: a 2D numpy array with all entries either 0 or 1
+# (one vectorized pass, no np.unique)
+def is_valid_board(a):
+    if (not isinstance(a, np.ndarray)) or (a.ndim != 2):
+        return False
+    return bool(np.all((a == 0) | (a == 1)))
+
+
+# the number of live neighbors of every cell, the board wraps around (toroidal)
+# method="roll": sum the shifted copies of the board (np.roll wraps around)
+# method="convolve": scipy.signal.convolve2d with a 3x3 kernel and boundary="wrap"
+def count_neighbors(a, method="roll"):
+    cells = a.astype(np.uint8)
+    if method == "roll":
+        # 1. the cell + the cells above and below
+        column_sum = cells + np.roll(cells, 1, axis=0) + np.roll(cells, -1, axis=0)
+        # 2. + the same thing on the left and on the right, then remove the cell itself
+        return column_sum + np.roll(column_sum, 1, axis=1) + np.roll(column_sum, -1, axis=1) - cells
+    elif method == "convolve":
+        from scipy.signal import convolve2d
+        kernel = np.array([[1, 1, 1],
+                           [1, 0, 1],
+                           [1, 1, 1]], dtype=np.uint8)
+        return convolve2d(cells, kernel, mode="same", boundary="wrap")
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+
+# vectorized gol_step: the same rules and the same toroidal board, no Python loop over the cells
+def gol_step_vectorized(a, method="roll"):
+    #ensure the argument is valid
+    if not is_valid_board(a):
+        raise ValueError("The input is not a valid Game of Life board!")
+
+    neighbors = count_neighbors(a, method)
+    alive = a == 1
+    # a live cell with 2 or 3 live neighbors stays alive, a dead cell with exactly 3 becomes alive
+    next_board = (neighbors == 3) | (alive & (neighbors == 2))
+    #same dtype as gol_step (float 0.0/1.0)
+    return next_board.astype(np.float64)
+
+
+# random board with about `density` of the cells alive
+def random_board(m, n, density=0.3, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.random((m, n)) < density).astype(np.float64)
+
+
+# run every step function on the same board for `steps` steps, check they agree, and print the time per step
+# step_functions: {name: function(board) => next board}
+def benchmark_steps(step_functions, board, steps=1):
+    results = {}
+    print("Engine                    Time per step (s)")
+    print("--------------------------------------------")
+    for name, step in step_functions.items():
+        current_board = board
+        start = time.perf_counter()
+        for _ in range(steps):
+            current_board = step(current_board)
+        per_step = (time.perf_counter() - start) / steps
+        results[name] = (per_step, current_board)
+        print(f"{name:<25} {per_step:.6f}")
+
+    boards = [current_board for per_step, current_board in results.values()]
+    if any(not np.array_equal(boards[0], other) for other in boards[1:]):
+        raise AssertionError("The engines give different boards!")
+    return results
+
+
+# Bit-packed board: 1 bit per cell, 64 cells per uint64 word (64x less memory than a float64 board)
+# row i, column j => bit (j % 64) of words[i, j // 64] (the np.packbits(..., bitorder="little") layout)
+# the step adds up the 8 neighbor bit planes with bitwise full adders, so every word updates 64 cells at once
+class PackedBoard:
+    def __init__(self, words, n):
+        self.words = words
+        self.m = words.shape[0]
+        self.n = n
+
+    @property
+    def shape(self):
+        return (self.m, self.n)
+
+    @classmethod
+    def from_array(cls, a):
+        if not is_valid_board(a):
+            raise ValueError("The input is not a valid Game of Life board!")
+        m, n = a.shape
+        num_words = (n + 63) // 64
+        packed = np.packbits(a.astype(bool), axis=1, bitorder="little")
+        #pad every row to a whole number of words
+        row_bytes = np.zeros((m, num_words * 8), dtype=np.uint8)
+        row_bytes[:, :packed.shape[1]] = packed
+        return cls(row_bytes.view("<u8").copy(), n)
+
+    # back to the float 0.0/1.0 board used by gol_step/draw_gol_board
+    def to_array(self):
+        cells = np.unpackbits(self.words.view(np.uint8), axis=1, count=self.n, bitorder="little")
+        return cells.astype(np.float64)
+
+    # the number of live cells
+    def population(self):
+        return int(np.unpackbits(self.words.view(np.uint8)).sum())
+
+    # the bits of the last word that are real cells (the rest is padding and must stay 0)
+    def last_word_mask(self):
+        used = self.n - 64 * (self.words.shape[1] - 1)
+        return np.uint64((1 << used) - 1) if used < 64 else np.uint64(0xFFFFFFFFFFFFFFFF)
+
+    # every cell gets the value of its left neighbor (column j-1, wraps around)
+    def shift_from_left(self, words):
+        shifted = words << np.uint64(1)
+        shifted[:, 1:] |= words[:, :-1] >> np.uint64(63)
+        #column 0 gets column n-1
+        last = (self.n - 1) % 64
+        shifted[:, 0] = (shifted[:, 0] & ~np.uint64(1)) | ((words[:, -1] >> np.uint64(last)) & np.uint64(1))
+        return shifted
+
+    # every cell gets the value of its right neighbor (column j+1, wraps around)
+    def shift_from_right(self, words):
+        shifted = words >> np.uint64(1)
+        shifted[:, :-1] |= words[:, 1:] << np.uint64(63)
+        #column n-1 gets column 0
+        last = np.uint64((self.n - 1) % 64)
+        shifted[:, -1] = (shifted[:, -1] & ~(np.uint64(1) << last)) | ((words[:, 0] & np.uint64(1)) << last)
+        return shifted
+
+    def step(self, steps=1):
+        words = self.words
+        mask = self.last_word_mask()
+        for _ in range(steps):
+            # 3-bit counter (s2 s1 s0) of the live neighbors, one bit per cell
+            # (8 neighbors => 000, that's fine because only 2 and 3 matter)
+            s0 = np.zeros_like(words)
+            s1 = np.zeros_like(words)
+            s2 = np.zeros_like(words)
+            above = np.roll(words, 1, axis=0)
+            below = np.roll(words, -1, axis=0)
+            for row in (above, words, below):
+                for neighbor in (self.shift_from_left(row), self.shift_from_right(row), row):
+                    if neighbor is words:
+                        continue #the cell itself
+                    #add one bit plane: half adders s0 -> s1 -> s2
+                    carry0 = s0 & neighbor
+                    s0 ^= neighbor
+                    carry1 = s1 & carry0
+                    s1 ^= carry0
+                    s2 ^= carry1
+            # alive next step: exactly 3 neighbors, or alive with exactly 2 (count 011 or alive & 010)
+            words = ~s2 & s1 & (s0 | words)
+            words[:, -1] &= mask
+        self.words = words
+        return self
+
+
+# Hashlife: the board is a quadtree, equal sub-squares are the same node (hash-consing),
+# and the future of every node is memoized, so repeated patterns are only computed once
+# a node of level k is a 2^k x 2^k square: nw, ne, sw, se are its 4 level k-1 quadrants
+class QuadNode:
+    __slots__ = ("level", "nw", "ne", "sw", "se", "population")
+
+    def __init__(self, level, nw, ne, sw, se, population):
+        self.level = level
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.population = population
+
+
+class HashLife:
+    def __init__(self):
+        self.nodes = {}         #(nw, ne, sw, se) => node, so equal squares are the same object
+        self.results = {}       #(node, j) => center of the node after 2^j generations
+        self.torus_results = {} #(node, k) => the node as a torus after 2^k generations
+        self.dead = QuadNode(0, None, None, None, None, 0)
+        self.alive = QuadNode(0, None, None, None, None, 1)
+        self.zeros = [self.dead]
+
+    def join(self, nw, ne, sw, se):
+        key = (nw, ne, sw, se)
+        node = self.nodes.get(key)
+        if node is None:
+            node = QuadNode(nw.level + 1, nw, ne, sw, se,
+                            nw.population + ne.population + sw.population + se.population)
+            self.nodes[key] = node
+        return node
+
+    # the empty node of level k
+    def zero(self, k):
+        while len(self.zeros) <= k:
+            z = self.zeros[-1]
+            self.zeros.append(self.join(z, z, z, z))
+        return self.zeros[k]
+
+    # the node in the middle of an empty node one level up
+    def centre(self, node):
+        z = self.zero(node.level - 1)
+        return self.join(self.join(z, z, z, node.nw), self.join(z, z, node.ne, z),
+                         self.join(z, node.sw, z, z), self.join(node.se, z, z, z))
+
+    # the middle 2^(k-1) x 2^(k-1) square of a level k node
+    def inner(self, node):
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    # base case: the middle 2x2 cells of a 4x4 node after one generation
+    def life_4x4(self, node):
+        cells = [[node.nw.nw.population, node.nw.ne.population, node.ne.nw.population, node.ne.ne.population],
+                 [node.nw.sw.population, node.nw.se.population, node.ne.sw.population, node.ne.se.population],
+                 [node.sw.nw.population, node.sw.ne.population, node.se.nw.population, node.se.ne.population],
+                 [node.sw.sw.population, node.sw.se.population, node.se.sw.population, node.se.se.population]]
+
+        def rule(i, j):
+            neighbors = sum(cells[r][c] for r in (i - 1, i, i + 1) for c in (j - 1, j, j + 1)) - cells[i][j]
+            return self.alive if neighbors == 3 or (neighbors == 2 and cells[i][j]) else self.dead
+
+        return self.join(rule(1, 1), rule(1, 2), rule(2, 1), rule(2, 2))
+
+    # the middle 2^(k-1) x 2^(k-1) square of a level k node after 2^j generations (j <= k-2),
+    # assuming everything outside the node is dead
+    def successor(self, node, j):
+        j = min(j, node.level - 2)
+        key = (node, j)
+        if key in self.results:
+            return self.results[key]
+
+        if node.population == 0:
+            result = node.nw
+        elif node.level == 2:
+            result = self.life_4x4(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            # 9 overlapping level k-1 squares, each advanced 2^j (or 2^(j-1)) generations
+            c1 = self.successor(nw, j)
+            c2 = self.successor(self.join(nw.ne, ne.nw, nw.se, ne.sw), j)
+            c3 = self.successor(ne, j)
+            c4 = self.successor(self.join(nw.sw, nw.se, sw.nw, sw.ne), j)
+            c5 = self.successor(self.inner(node), j)
+            c6 = self.successor(self.join(ne.sw, ne.se, se.nw, se.ne), j)
+            c7 = self.successor(sw, j)
+            c8 = self.successor(self.join(sw.ne, se.nw, sw.se, se.sw), j)
+            c9 = self.successor(se, j)
+            if j < node.level - 2:
+                #already 2^j generations: just take the middle parts
+                result = self.join(self.join(c1.se, c2.sw, c4.ne, c5.nw), self.join(c2.se, c3.sw, c5.ne, c6.nw),
+                                   self.join(c4.se, c5.sw, c7.ne, c8.nw), self.join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:
+                #2^(k-3) generations so far: 2^(k-3) more on the 4 combined squares
+                result = self.join(self.successor(self.join(c1, c2, c4, c5), j),
+                                   self.successor(self.join(c2, c3, c5, c6), j),
+                                   self.successor(self.join(c4, c5, c7, c8), j),
+                                   self.successor(self.join(c5, c6, c8, c9), j))
+        self.results[key] = result
+        return result
+
+    # a 2^j x 2^j torus after 2^k generations (k <= j-1: one successor call on 2x2 copies of the torus,
+    # bigger k: 2 jumps of 2^(k-1), both memoized)
+    def torus_jump(self, node, k):
+        key = (node, k)
+        if key in self.torus_results:
+            return self.torus_results[key]
+
+        if k <= node.level - 1:
+            #the middle of 2x2 copies = the torus shifted by half its size
+            shifted = self.successor(self.join(node, node, node, node), k)
+            #shift it back the same way
+            result = self.join(shifted.se, shifted.sw, shifted.ne, shifted.nw)
+        else:
+            result = self.torus_jump(self.torus_jump(node, k - 1), k - 1)
+        self.torus_results[key] = result
+        return result
+
+    # quadtree of a 2^k x 2^k 0/1 array
+    def from_cells(self, cells):
+        size = cells.shape[0]
+        if size == 1:
+            return self.alive if cells[0, 0] else self.dead
+        if not cells.any():
+            return self.zero(size.bit_length() - 1)
+        half = size // 2
+        return self.join(self.from_cells(cells[:half, :half]), self.from_cells(cells[:half, half:]),
+                         self.from_cells(cells[half:, :half]), self.from_cells(cells[half:, half:]))
+
+    # write the live cells of the node (top-left corner at row top, column left) into out,
+    # the cells outside of out are skipped
+    def fill(self, node, out, top, left):
+        size = 1 << node.level
+        if (node.population == 0 or top >= out.shape[0] or left >= out.shape[1]
+                or top + size <= 0 or left + size <= 0):
+            return
+        if node.level == 0:
+            out[top, left] = 1
+            return
+        half = size // 2
+        self.fill(node.nw, out, top, left)
+        self.fill(node.ne, out, top, left + half)
+        self.fill(node.sw, out, top + half, left)
+        self.fill(node.se, out, top + half, left + half)
+
+
+# one table shared by every board, so the memoized results are reused between boards
+HASHLIFE = HashLife()
+
+
+# A Game of Life board on the Hashlife engine
+# toroidal=False: an infinite plane, the cells outside the board are dead (patterns can leave the board)
+# toroidal=True: the same wrap-around board as gol_step, the board has to be 2^j x 2^j
+class HashLifeBoard:
+    def __init__(self, node, top, left, shape, toroidal=False, engine=HASHLIFE):
+        self.node = node
+        self.top, self.left = top, left #position of the node's top-left corner
+        self.shape = shape
+        self.toroidal = toroidal
+        self.engine = engine
+        self.generation = 0
+
+    @classmethod
+    def from_array(cls, a, toroidal=False, engine=HASHLIFE):
+        if not is_valid_board(a):
+            raise ValueError("The input is not a valid Game of Life board!")
+        m, n = a.shape
+        if toroidal:
+            if m != n or m < 2 or m & (m - 1):
+                raise ValueError(f"A toroidal Hashlife board has to be 2^j x 2^j, got {m}x{n}")
+            return cls(engine.from_cells(a != 0), 0, 0, a.shape, True, engine)
+        #square of side 2^k (at least 4x4) with the board in its top-left corner
+        size = 4
+        while size < max(m, n):
+            size *= 2
+        cells = np.zeros((size, size), dtype=bool)
+        cells[:m, :n] = a != 0
+        return cls(engine.from_cells(cells), 0, 0, a.shape, False, engine)
+
+    # the board (same float 0.0/1.0 format as gol_step), or another window of the infinite plane
+    def to_array(self, top=0, left=0, shape=None):
+        out = np.zeros(self.shape if shape is None else shape)
+        self.engine.fill(self.node, out, self.top - top, self.left - left)
+        return out
+
+    def population(self):
+        return self.node.population
+
+    # advance 2^k generations
+    def jump(self, k):
+        engine = self.engine
+        if self.toroidal:
+            self.node = engine.torus_jump(self.node, k)
+        else:
+            #pad with dead cells until the pattern sits in the middle quarter
+            # and the node is big enough for 2^k generations
+            while (self.node.level < k + 3
+                   or engine.inner(engine.inner(self.node)).population != self.node.population):
+                half = 1 << (self.node.level - 1)
+                self.node = engine.centre(self.node)
+                self.top -= half
+                self.left -= half
+            quarter = 1 << (self.node.level - 2)
+            self.node = engine.successor(self.node, k)
+            self.top += quarter
+            self.left += quarter
+        self.generation += 1 << k
+        return self
+
+    # advance any number of generations (one jump per bit of the number)
+    def step(self, generations=1):
+        k = 0
+        while generations:
+            if generations & 1:
+                self.jump(k)
+            generations >>= 1
+            k += 1
+        return self
+
+
+# next state of the inner cells of a block that has a 1-cell border of neighbors around it
+def step_block(block):
+    column_sum = block[:-2] + block[1:-1] + block[2:]
+    inner = block[1:-1, 1:-1]
+    neighbors = column_sum[:, :-2] + column_sum[:, 1:-1] + column_sum[:, 2:] - inner
+    return ((neighbors == 3) | ((inner == 1) & (neighbors == 2))).astype(np.uint8)
+
+
+# A mostly dead board: the board is cut into tile_size x tile_size tiles and a step only recomputes
+# the active tiles (the tiles that changed in the last step + their 8 neighbors, wrapping around),
+# so the time per step depends on how much is going on instead of the size of the board
+class SparseBoard:
+    def __init__(self, a, tile_size=32):
+        if not is_valid_board(a):
+            raise ValueError("The input is not a valid Game of Life board!")
+        self.cells = (a != 0).astype(np.uint8)
+        self.tile_size = tile_size
+        m, n = a.shape
+        tile_rows = (m + tile_size - 1) // tile_size
+        tile_cols = (n + tile_size - 1) // tile_size
+        #at the start: the tiles with a live cell (+ neighbors), a dead tile with dead neighbors stays dead
+        padded = np.zeros((tile_rows * tile_size, tile_cols * tile_size), dtype=np.uint8)
+        padded[:m, :n] = self.cells
+        has_live = padded.reshape(tile_rows, tile_size, tile_cols, tile_size).any(axis=(1, 3))
+        self.active = self.with_neighbors(has_live)
+
+    # the tiles + their 8 neighbor tiles (wraps around)
+    def with_neighbors(self, tiles):
+        rows = tiles | np.roll(tiles, 1, axis=0) | np.roll(tiles, -1, axis=0)
+        return rows | np.roll(rows, 1, axis=1) | np.roll(rows, -1, axis=1)
+
+    # the cells [r0, r1) x [c0, c1) + a 1-cell border, wrapping around at the edges of the board
+    def halo(self, r0, r1, c0, c1):
+        m, n = self.cells.shape
+        if r0 > 0 and c0 > 0 and r1 < m and c1 < n:
+            return self.cells[r0 - 1:r1 + 1, c0 - 1:c1 + 1]
+        rows = np.arange(r0 - 1, r1 + 1) % m
+        cols = np.arange(c0 - 1, c1 + 1) % n
+        return self.cells[np.ix_(rows, cols)]
+
+    def step(self, steps=1):
+        m, n = self.cells.shape
+        t = self.tile_size
+        for _ in range(steps):
+            #compute every active tile from the current board first, then write the ones that changed
+            updates = []
+            for i, j in zip(*np.nonzero(self.active)):
+                r0, c0 = i * t, j * t
+                r1, c1 = min(r0 + t, m), min(c0 + t, n)
+                new_tile = step_block(self.halo(r0, r1, c0, c1))
+                if not np.array_equal(new_tile, self.cells[r0:r1, c0:c1]):
+                    updates.append((i, j, new_tile))
+
+            changed = np.zeros_like(self.active)
+            for i, j, new_tile in updates:
+                self.cells[i * t:i * t + new_tile.shape[0], j * t:j * t + new_tile.shape[1]] = new_tile
+                changed[i, j] = True
+            self.active = self.with_neighbors(changed)
+        return self
+
+    def active_tiles(self):
+        return int(self.active.sum())
+
+    # same float 0.0/1.0 format as gol_step
+    def to_array(self):
+        return self.cells.astype(np.float64)
+
+
+# one worker of ParallelBoard: steps the rows [r0, r1) of the board in the shared memory block
+# the block holds 2 boards (double buffering): generation g is in board g % 2
+# the halo rows r0-1 and r1 (wrapping around) are read straight from the other bands in the shared board
+def band_worker(shm_name, shape, r0, r1, generation, command, start, step_done, done):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    boards = np.ndarray((2,) + shape, dtype=np.uint8, buffer=shm.buf)
+    m = shape[0]
+    try:
+        while True:
+            start.wait()
+            steps = command.value
+            if steps < 0:
+                break
+            for g in range(generation.value, generation.value + steps):
+                current, next_board = boards[g % 2], boards[(g + 1) % 2]
+                if r0 > 0 and r1 < m:
+                    rows = current[r0 - 1:r1 + 1]
+                else:
+                    rows = current[np.arange(r0 - 1, r1 + 1) % m]
+                column_sum = rows[:-2] + rows[1:-1] + rows[2:]
+                inner = rows[1:-1]
+                neighbors = column_sum + np.roll(column_sum, 1, axis=1) + np.roll(column_sum, -1, axis=1) - inner
+                next_board[r0:r1] = (neighbors == 3) | ((inner == 1) & (neighbors == 2))
+                #nobody starts the next generation before the whole board is written
+                step_done.wait()
+            done.wait()
+    finally:
+        del boards
+        shm.close()
+
+
+# Multi-core board: the board is split into row bands, one worker process per band,
+# in a shared memory block so that nothing is copied between the processes
+# (use it in a with block, or call close() at the end, to stop the workers and free the shared memory)
+class ParallelBoard:
+    def __init__(self, a, workers=None):
+        if not is_valid_board(a):
+            raise ValueError("The input is not a valid Game of Life board!")
+        m, n = a.shape
+        workers = min(workers or os.cpu_count() or 1, m)
+        self.shape = a.shape
+        self.shm = shared_memory.SharedMemory(create=True, size=2 * m * n)
+        self.boards = np.ndarray((2, m, n), dtype=np.uint8, buffer=self.shm.buf)
+        self.boards[0] = a != 0
+
+        self.generation = multiprocessing.Value("q", 0, lock=False)
+        self.command = multiprocessing.Value("q", 0, lock=False)
+        self.start = multiprocessing.Barrier(workers + 1)
+        self.done = multiprocessing.Barrier(workers + 1)
+        step_done = multiprocessing.Barrier(workers)
+        bounds = np.linspace(0, m, workers + 1).astype(int)
+        self.workers = [multiprocessing.Process(target=band_worker,
+                                                args=(self.shm.name, self.shape, bounds[i], bounds[i + 1],
+                                                      self.generation, self.command, self.start, step_done, self.done),
+                                                daemon=True)
+                        for i in range(workers)]
+        for worker in self.workers:
+            worker.start()
+
+    def step(self, steps=1):
+        self.command.value = steps
+        self.start.wait()
+        self.done.wait()
+        self.generation.value += steps
+        return self
+
+    # same float 0.0/1.0 format as gol_step
+    def to_array(self):
+        return self.boards[self.generation.value % 2].astype(np.float64)
+
+    def close(self):
+        if self.workers:
+            self.command.value = -1
+            self.start.wait()
+            for worker in self.workers:
+                worker.join()
+            self.workers = []
+            del self.boards
+            self.shm.close()
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Game of Life simulator: the board is checked once here, then every step works in 2 preallocated
+# uint8 boards (current / next, swapped after each generation) and 2 scratch arrays, so step()
+# allocates no new arrays
+class GameOfLife:
+    def __init__(self, a):
+        if not is_valid_board(a):
+            raise ValueError("The input is not a valid Game of Life board!")
+        self.boards = np.zeros((2,) + a.shape, dtype=np.uint8)
+        self.boards[0] = a != 0
+        self.current = 0
+        self.column_sum = np.zeros(a.shape, dtype=np.uint8)
+        self.neighbors = np.zeros(a.shape, dtype=np.uint8)
+        self.generation = 0
+
+    # the current board (a view, it changes with the next step)
+    @property
+    def board(self):
+        return self.boards[self.current]
+
+    def step(self, n=1):
+        column_sum, neighbors = self.column_sum, self.neighbors
+        for _ in range(n):
+            cells, next_board = self.boards[self.current], self.boards[1 - self.current]
+            # 1. the cell + the cells above and below (wrapping around)
+            np.add(cells[1:], cells[:-1], out=column_sum[1:])
+            np.add(cells[0], cells[-1], out=column_sum[0])
+            np.add(column_sum[:-1], cells[1:], out=column_sum[:-1])
+            np.add(column_sum[-1], cells[0], out=column_sum[-1])
+            # 2. + the same on the left and on the right, minus the cell
+            np.add(column_sum[:, 1:], column_sum[:, :-1], out=neighbors[:, 1:])
+            np.add(column_sum[:, 0], column_sum[:, -1], out=neighbors[:, 0])
+            np.add(neighbors[:, :-1], column_sum[:, 1:], out=neighbors[:, :-1])
+            np.add(neighbors[:, -1], column_sum[:, 0], out=neighbors[:, -1])
+            np.subtract(neighbors, cells, out=neighbors)
+            # 3. alive next step: 3 neighbors, or alive with 2 => (neighbors | cell) == 3
+            np.bitwise_or(neighbors, cells, out=neighbors)
+            np.equal(neighbors, 3, out=next_board)
+            self.current = 1 - self.current
+        self.generation += n
+        return self
+
+    # same float 0.0/1.0 format as gol_step
+    def to_array(self):
+        return self.board.astype(np.float64)
@@ -0,0 +1,256 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# the nearest centroid of every point, chunk by chunk so only a (chunk x K) block of distances
+# is in memory at the same time (memory_budget in bytes)
+# ||x||^2 is the same for every centroid, so the argmin only needs ||c||^2 - 2 x.c
+def assign_labels(data, centroids, memory_budget=8 * 2**20, return_distances=False):
+    n, K = len(data), len(centroids)
+    chunk_size = max(1, memory_budget // (8 * K))
+    centroids_sq = np.einsum('ij,ij->i', centroids, centroids)
+    labels = np.empty(n, dtype=np.intp)
+    min_distances = np.empty(n) if return_distances else None
+    for start in range(0, n, chunk_size):
+        chunk = data[start:start + chunk_size]
+        scores = chunk @ (-2 * centroids.T)
+        scores += centroids_sq
+        chunk_labels = np.argmin(scores, axis=1)
+        labels[start:start + chunk_size] = chunk_labels
+        if return_distances:
+            nearest = scores[np.arange(len(chunk)), chunk_labels] + np.einsum('ij,ij->i', chunk, chunk)
+            min_distances[start:start + chunk_size] = np.maximum(nearest, 0)
+    if return_distances:
+        return labels, min_distances
+    return labels
+
+
+# mean of the points of every cluster, one np.bincount per column instead of K boolean masks
+# (an empty cluster gets nan, like data[labels == k].mean(axis=0))
+def update_centroids(data, labels, K):
+    counts = np.bincount(labels, minlength=K)
+    sums = np.stack([np.bincount(labels, weights=data[:, d], minlength=K) for d in range(data.shape[1])], axis=1)
+    with np.errstate(invalid='ignore'):
+        return sums / counts[:, np.newaxis]
+
+
+# SSE in one pass: sum of the squared distances between the points and their centroids
+def compute_sse_fast(data, labels, centroids):
+    return float(np.sum((data - centroids[labels])**2))
+
+
+# K-means with the assignment and update above, same rounds and convergence check as kmeans
+# centroids: the initial centroids (default: K random data points)
+def kmeans_fast(data, K, centroids=None, max_iterations=None, memory_budget=8 * 2**20, rng=None):
+    if max_iterations is None:
+        max_iterations = K*50 #avoid the non-stop cases
+    if centroids is None:
+        rng = np.random.default_rng() if rng is None else rng
+        centroids = data[rng.choice(data.shape[0], K, replace=False)]
+
+    for round in range(max_iterations):
+        labels = assign_labels(data, centroids, memory_budget)
+        new_centroids = update_centroids(data, labels, K)
+        #check for convergence
+        if np.all(new_centroids == centroids):
+            break
+        centroids = new_centroids
+    return labels, centroids
+
+
+# k-means++ seeding: the first centroid is a random point, every next one is a point picked with
+# probability proportional to its squared distance to the nearest centroid so far
+# centroids: centroids to start from (warm start: only the missing ones are added)
+def kmeans_plus_plus(data, K, rng, centroids=None):
+    if centroids is None:
+        centroids = data[[rng.integers(len(data))]]
+    else:
+        #empty clusters of the previous solution (nan) are dropped
+        centroids = centroids[~np.isnan(centroids).any(axis=1)][:K]
+    closest = assign_labels(data, centroids, return_distances=True)[1]
+    while len(centroids) < K:
+        cumulative = np.cumsum(closest)
+        if cumulative[-1] > 0:
+            index = min(np.searchsorted(cumulative, rng.random() * cumulative[-1], side='right'), len(data) - 1)
+        else:
+            #all the points are centroids already
+            index = rng.integers(len(data))
+        centroids = np.vstack([centroids, data[index]])
+        np.minimum(closest, np.sum((data - data[index])**2, axis=1), out=closest)
+    return centroids
+
+
+# the data of the pool workers: attached once per worker process from the shared memory block,
+# so the tasks only send K values and seeds
+worker_data = {}
+
+
+def attach_shared_data(name, shape, dtype):
+    worker_data['shm'] = shared_memory.SharedMemory(name=name)
+    worker_data['data'] = np.ndarray(shape, dtype=dtype, buffer=worker_data['shm'].buf)
+
+
+# one pool task: k-means++ + kmeans_fast for every K in K_values, in order
+# warm_start=True: the centroids of K are the start of K+1 (plus one new k-means++ centroid)
+def run_kmeans_chain(K_values, seed, warm_start, max_iterations):
+    data = worker_data['data']
+    rng = np.random.default_rng(seed)
+    results = []
+    centroids = None
+    for K in K_values:
+        init = kmeans_plus_plus(data, K, rng, centroids if warm_start else None)
+        labels, centroids = kmeans_fast(data, K, centroids=init, max_iterations=max_iterations)
+        results.append((K, compute_sse_fast(data, labels, centroids), centroids))
+    return results
+
+
+# K-means for every K in K_values, `restarts` times each, in a process pool
+# every task gets its own seed from `seed`, so the result doesn't depend on the number of workers
+# max_iterations: rounds limit of every run (default K*50, like kmeans)
+# returns {K: [(sse, centroids) of every restart]}
+def kmeans_sweep(data, K_values, restarts=1, seed=0, workers=None, warm_start=False, max_iterations=None):
+    K_values = list(K_values)
+    if warm_start:
+        #one chain over all the K values per restart
+        tasks = [K_values] * restarts
+    else:
+        tasks = [[K] for _ in range(restarts) for K in K_values]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    data = np.ascontiguousarray(data, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(data.nbytes, 1))
+    try:
+        np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)[:] = data
+        results = {K: [] for K in K_values}
+        with ProcessPoolExecutor(workers, initializer=attach_shared_data,
+                                 initargs=(shm.name, data.shape, data.dtype.str)) as pool:
+            for chain in pool.map(run_kmeans_chain, tasks, seeds, [warm_start] * len(tasks), [max_iterations] * len(tasks)):
+                for K, sse, centroids in chain:
+                    results[K].append((sse, centroids))
+        return results
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+# the best (lowest SSE) restart of every K: {K: (sse, centroids)}
+def best_of_restarts(results):
+    return {K: min(runs, key=lambda run: run[0]) for K, runs in results.items()}
+
+
+# the points of a file, chunk_size rows at a time: a .npy file is memory-mapped,
+# anything else is read as csv with pd.read_csv(chunksize=...) (columns: the feature columns)
+def iter_chunks(source, chunk_size=100_000, columns=('x', 'y')):
+    if str(source).endswith('.npy'):
+        points = np.load(source, mmap_mode='r')
+        for start in range(0, len(points), chunk_size):
+            yield np.asarray(points[start:start + chunk_size], dtype=np.float64)
+    else:
+        import pandas as pd
+        for chunk in pd.read_csv(source, chunksize=chunk_size, usecols=list(columns)):
+            yield chunk[list(columns)].values.astype(np.float64)
+
+
+# Mini-batch k-means on a file that doesn't have to fit in memory: one chunk at a time,
+# every centroid moves towards the mean of its points in the chunk with its own learning rate
+# (points in the chunk / points seen so far), so a centroid is the running mean of all its points
+# returns the centroids and the number of points every centroid has seen
+def minibatch_kmeans(source, K, chunk_size=100_000, epochs=1, seed=0, columns=('x', 'y')):
+    rng = np.random.default_rng(seed)
+    centroids = None
+    counts = np.zeros(K)
+    for epoch in range(epochs):
+        for chunk in iter_chunks(source, chunk_size, columns):
+            if centroids is None:
+                #k-means++ on the first chunk
+                centroids = kmeans_plus_plus(chunk, K, rng)
+            labels = assign_labels(chunk, centroids)
+            chunk_counts = np.bincount(labels, minlength=K)
+            chunk_sums = np.stack([np.bincount(labels, weights=chunk[:, d], minlength=K)
+                                   for d in range(chunk.shape[1])], axis=1)
+            counts += chunk_counts
+            seen = chunk_counts > 0
+            #c += (sum of the new points - (new points) * c) / (all the points so far)
+            centroids[seen] += (chunk_sums[seen] - chunk_counts[seen, np.newaxis] * centroids[seen]) / counts[seen, np.newaxis]
+    return centroids, counts
+
+
+# SSE of the centroids over the whole file in one pass (each point against its nearest centroid)
+def streaming_sse(source, centroids, chunk_size=100_000, columns=('x', 'y')):
+    sse = 0.0
+    for chunk in iter_chunks(source, chunk_size, columns):
+        sse += float(assign_labels(chunk, centroids, return_distances=True)[1].sum())
+    return sse
+
+
+# distances between the points and one centroid, computed exactly like
+# np.linalg.norm(data[:, np.newaxis] - centroids, axis=2) in kmeans (so the results are the same bits)
+def point_distances(points, centroid):
+    return np.sqrt(np.sum((points - centroid)**2, axis=-1))
+
+
+# K-means with Elkan's bounds: every point keeps an upper bound of the distance to its centroid and a
+# lower bound of the distance to every centroid, the centroids moving only loosen them a bit, and
+# a distance is only computed when the bounds (or half the distance between two centroids) can't
+# rule the centroid out. Same labels, centroids and rounds as kmeans (ties go to the lower index like
+# np.argmin), because every distance that can decide the label is computed the same way.
+# returns labels, centroids and {'distance_evaluations', 'saved'} (saved: distances kmeans computes but this doesn't)
+def kmeans_elkan(data, K, centroids=None, max_iterations=None, rng=None):
+    if max_iterations is None:
+        max_iterations = K*50 #avoid the non-stop cases
+    if centroids is None:
+        rng = np.random.default_rng() if rng is None else rng
+        centroids = data[rng.choice(data.shape[0], K, replace=False)]
+    n = len(data)
+    #the bounds are rounded too: only trust them with a small margin
+    margin = 1e-9
+    evaluations = 0
+    lower = None
+
+    for round in range(max_iterations):
+        if lower is None or np.isnan(centroids).any():
+            #first round (or an empty cluster, nan centroid): all the distances
+            lower = np.linalg.norm(data[:, np.newaxis] - centroids, axis=2)
+            labels = np.argmin(lower, axis=1)
+            upper = lower[np.arange(n), labels]
+            evaluations += n * K
+        else:
+            centroid_distances = np.linalg.norm(centroids[:, np.newaxis] - centroids, axis=2)
+            np.fill_diagonal(centroid_distances, np.inf)
+            half_nearest = 0.5 * centroid_distances.min(axis=1)
+            #points whose centroid may have changed
+            check = np.nonzero(upper * (1 + margin) >= half_nearest[labels] * (1 - margin))[0]
+            #exact distance to the current centroid
+            upper[check] = point_distances(data[check], centroids[labels[check]])
+            lower[check, labels[check]] = upper[check]
+            evaluations += len(check)
+            for j in range(K):
+                u = upper[check] * (1 + margin)
+                a = labels[check]
+                candidates = check[(a != j) & (u >= lower[check, j] * (1 - margin))
+                                   & (u >= 0.5 * centroid_distances[a, j] * (1 - margin))]
+                if len(candidates) == 0:
+                    continue
+                distances = point_distances(data[candidates], centroids[j])
+                lower[candidates, j] = distances
+                evaluations += len(candidates)
+                #closer, or as close with a lower index (np.argmin)
+                better = (distances < upper[candidates]) | ((distances == upper[candidates]) & (j < labels[candidates]))
+                labels[candidates[better]] = j
+                upper[candidates[better]] = distances[better]
+
+        new_centroids = update_centroids(data, labels, K)
+        #check for convergence
+        if np.all(new_centroids == centroids):
+            break
+        #the bounds after the centroids move
+        drift = point_distances(new_centroids, centroids)
+        upper += drift[labels]
+        lower -= drift
+        np.maximum(lower, 0, out=lower)
+        centroids = new_centroids
+
+    stats = {'distance_evaluations': evaluations, 'saved': n * K * (round + 1) - evaluations}
+    return labels, centroids, stats